@@ -0,0 +1,176 @@
+"""
+API Service Module
+Compact JSON for the catalog and cart endpoints under /api.
+
+Products are read as plain row tuples of just the requested columns
+(?fields=id,name,price), never as full ORM objects. Catalog responses carry
+an ETag derived from catalog_version and the query string, so a client
+refreshing prices gets a 304 without any SQL; bodies over API_GZIP_MIN_BYTES
+are gzipped when the client accepts it.
+"""
+
+import gzip
+import hashlib
+import json
+
+from flask import current_app, make_response, request
+
+from catalog_service import SORT_OPTIONS, DEFAULT_SORT, paginate_products
+from models import db, Product
+from settings_service import get_settings
+
+# Public field name -> column
+API_FIELDS = {
+    'id': Product.id,
+    'name': Product.name,
+    'description': Product.description,
+    'price': Product.price,
+    'availability': Product.availability,
+    'size': Product.size,
+    'color': Product.color,
+    'image': Product.image,
+}
+DEFAULT_FIELDS = ('id', 'name', 'price', 'availability', 'size', 'color', 'image')
+
+GZIP_LEVEL = 6
+
+
+def parse_fields(value):
+    """
+    Parse ?fields= into an ordered tuple of field names
+
+    Args:
+        value (str): comma-separated field names, or None for the defaults
+
+    Returns:
+        tuple: field names, always starting with 'id'
+
+    Raises:
+        ValueError: if an unknown field is requested
+    """
+    if not value:
+        return DEFAULT_FIELDS
+    fields = ['id']
+    for name in (part.strip() for part in value.split(',')):
+        if not name or name in fields:
+            continue
+        if name not in API_FIELDS:
+            raise ValueError(f"Unknown field '{name}'; choose from {', '.join(API_FIELDS)}")
+        fields.append(name)
+    return tuple(fields)
+
+
+def _columns(fields, extra=()):
+    """The requested columns, plus any the query itself needs (the sort key) at the end"""
+    names = list(fields) + [column.key for column in extra if column.key not in fields]
+    return [API_FIELDS[name] for name in names]
+
+
+def _serialize(rows, fields):
+    width = len(fields)
+    return [dict(zip(fields, row[:width])) for row in rows]
+
+
+def list_products(filters, cursor, limit, fields):
+    """
+    One keyset page of products as dicts of the requested fields
+
+    Returns:
+        tuple: (list of dicts, next cursor or None)
+    """
+    sort_column = SORT_OPTIONS[filters.get('sort', DEFAULT_SORT)][0]
+    query = db.session.query(*_columns(fields, extra=(sort_column,)))
+    page = paginate_products(filters, cursor, limit, query=query)
+    return _serialize(page.items, fields), page.next_cursor
+
+
+def get_product(product_id, fields):
+    """The requested fields of one product as a dict, or None if it does not exist"""
+    row = db.session.query(*_columns(fields)).filter(Product.id == product_id).first()
+    return _serialize([row], fields)[0] if row is not None else None
+
+
+def cart_payload(resolved):
+    """Cart lines, total and item count from a ResolvedCart"""
+    return {
+        'items': [{'id': item['product'].id, 'name': item['product'].name, 'price': item['product'].price,
+                   'quantity': item['quantity'], 'line_total': round(item['line_total'], 2)}
+                  for item in resolved.items],
+        'total': round(resolved.total, 2),
+        'count': resolved.count,
+    }
+
+
+def cart_delta(resolved, product_id, whatsapp_link):
+    """What changed after adding/removing one product: its line plus the new cart totals"""
+    line = next((item for item in resolved.items if item['product'].id == product_id), None)
+    return {
+        'id': product_id,
+        'quantity': line['quantity'] if line else 0,
+        'line_total': round(line['line_total'], 2) if line else 0,
+        'count': resolved.count,
+        'total': round(resolved.total, 2),
+        'whatsapp_link': whatsapp_link,
+    }
+
+
+def catalog_etag(*parts):
+    """ETag for a catalog response; changes whenever an admin edits products or a new build is deployed"""
+    key = (request.endpoint, parts, tuple(sorted(request.args.items(multi=True))),
+           get_settings()['catalog_version'], current_app.extensions.get('build_stamp'))
+    return hashlib.sha1(repr(key).encode()).hexdigest()
+
+
+def not_modified(etag):
+    """
+    Check If-None-Match against both encodings of a representation
+
+    Returns:
+        str: the tag the client holds (plain or gzip variant), or None
+    """
+    for tag in (etag, etag + '-gzip'):
+        if request.if_none_match.contains(tag):
+            return tag
+    return None
+
+
+def json_response(payload, status=200, etag=None, private=False):
+    """
+    Build a compact JSON response, gzipped when large, with an optional ETag
+
+    Args:
+        payload: JSON-serialisable data
+        status (int): HTTP status code
+        etag (str): strong ETag to set; per-visitor responses pass None and
+                    get one computed from the body
+        private (bool): mark the response as per-visitor (cart)
+    """
+    body = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode()
+    if etag is None and status == 200:
+        etag = hashlib.sha1(body).hexdigest()
+        held = not_modified(etag)
+        if held:
+            return empty_response(held, private)
+
+    compressed = (len(body) >= current_app.config.get('API_GZIP_MIN_BYTES', 1024)
+                  and request.accept_encodings['gzip'])
+    if compressed:
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    response = make_response(body, status)
+    response.mimetype = 'application/json'
+    response.vary.add('Accept-Encoding')
+    if compressed:
+        response.headers['Content-Encoding'] = 'gzip'
+    if etag:
+        response.set_etag(etag + '-gzip' if compressed else etag)
+    response.headers['Cache-Control'] = 'private, no-cache' if private else 'no-cache'
+    return response
+
+
+def empty_response(etag, private=False):
+    """304 for a client whose cached copy (tagged `etag`) is still current"""
+    response = make_response('', 304)
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = 'private, no-cache' if private else 'no-cache'
+    return response
@@ -1,102 +1,235 @@
-from flask import Flask, render_template, request, redirect, url_for, session, flash, send_from_directory
+from flask import (Blueprint, Flask, abort, current_app, render_template, request, redirect, url_for, session,
+                   flash, send_from_directory)
+from flask.cli import with_appcontext
+from werkzeug.middleware.proxy_fix import ProxyFix
 from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
 import os
-from models import db, Product, CustomOrder, Admin, Settings
-import json
+import time
+import click
+from models import db, Product, Admin, Settings, init_db, upgrade_schema
 from config import *
-from whatsapp_service import send_custom_order_notification, send_order_confirmation
+from whatsapp_service import send_custom_order_notification, generate_cart_order_link
+from catalog_service import (parse_catalog_args, paginate_products, count_products,
+                             distinct_values, bulk_update_products, SORT_OPTIONS)
+from cart_service import (resolve_session_cart, add_item, remove_item, normalise_phone, link_cart_to_phone,
+                          request_link_code, verify_link_code)
+from settings_service import get_whatsapp_number, update_settings, bump_catalog_version
+from page_cache import cached_page
+from image_service import generate_variants, load_variants
+from upload_service import (save_upload, store_existing, release_image, release_images_later,
+                            is_content_addressed)
+from asset_service import init_assets, build_assets
+from order_service import create_custom_order, paginate_orders, order_stats
+from search_service import ensure_search_index, rebuild_search_index, search_products
+from instrumentation import init_instrumentation, metrics_response
+from session_service import init_sessions, purge_expired_sessions
+from throttle_service import init_throttle, check_login, login_succeeded
+from retention_service import (init_retention, ensure_order_ids, ensure_order_rollups, rebuild_order_rollups,
+                               archive_orders)
+from notification_service import (init_notifications, notifications_enabled, wake_worker, drain_outbox,
+                                  make_transport, outbox_counts)
+from api_service import (parse_fields, list_products, get_product, cart_payload, cart_delta, catalog_etag,
+                         not_modified, json_response, empty_response)
 
-app = Flask(__name__)
-app.config.from_object('config')
+# Every page, admin and API view; registered on each app built by create_app()
+bp = Blueprint('main', __name__)
 
-db.init_app(app)
 
-# Create database tables
-with app.app_context():
-    db.create_all()
+def create_app(overrides=None):
+    """
+    Build and configure the Flask app
+
+    Importing this module builds no app: `flask --app app` finds this
+    factory and gunicorn loads `app:create_app()`. Building one does no
+    database I/O; the schema and default rows are created once by
+    `flask --app app bootstrap` (see bootstrap()), so gunicorn workers
+    start quickly and the app can be preloaded in the master process.
+    Views live on the `main` blueprint, so endpoints are `main.<view>`.
+
+    Args:
+        overrides (dict): config values applied on top of config.py
+
+    Returns:
+        Flask: the configured application
+    """
+    app = Flask(__name__)
+    app.config.from_object('config')
+    if overrides:
+        app.config.update(overrides)
+    if app.config.get('PROXY_FIX_X_FOR'):
+        # Behind a load balancer: take the client IP from X-Forwarded-For (used by login throttling)
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'], x_proto=1)
+
+    init_db(app)
+    init_instrumentation(app)
+    init_sessions(app)
+    init_throttle(app)
+    init_retention(app)
+    init_notifications(app)
+    app.register_blueprint(bp)
+    init_assets(app)
+    app.add_template_global(image_srcset)
+    for command in (bootstrap_command, backfill_images, hash_uploads, rebuild_search_command,
+                    notification_worker_command, build_assets_command, purge_sessions_command,
+                    archive_orders_command, rebuild_rollups_command):
+        app.cli.add_command(command)
+    return app
+
+
+def bootstrap():
+    """Create/upgrade tables and the search index, and seed the default admin and settings (idempotent)"""
+    upgrade_schema()
+    ensure_search_index()
+    ensure_order_ids()
+    ensure_order_rollups()
     # Create default admin if not exists
     if not Admin.query.filter_by(username='Nakha').first():
         admin = Admin(username='Nakha', password_hash=generate_password_hash('123456'))
         db.session.add(admin)
         db.session.commit()
-    
+
     # Create default settings if not exists
     if not Settings.query.first():
         settings = Settings(whatsapp_number=os.getenv('WHATSAPP_NUMBER', WHATSAPP_NUMBER))
         db.session.add(settings)
         db.session.commit()
 
-def get_whatsapp_number():
-    """Get WhatsApp number from database settings"""
-    settings = Settings.query.first()
-    if settings:
-        return settings.whatsapp_number
-    return os.getenv('WHATSAPP_NUMBER', WHATSAPP_NUMBER)
-
-@app.route('/')
+@bp.route('/')
+@cached_page
 def home():
     products = Product.query.filter_by(availability='available').limit(4).all()
     whatsapp_number = get_whatsapp_number()
     return render_template('home.html', products=products, whatsapp_number=whatsapp_number)
 
 
-@app.route('/products')
+@bp.route('/products')
+@cached_page
 def products():
-    products = Product.query.all()
-    return render_template('products.html', products=products)
+    filters = parse_catalog_args(request.args)
+    page = paginate_products(filters, request.args.get('cursor'), current_app.config['PRODUCTS_PER_PAGE'])
+    return render_template('products.html', products=page.items, next_cursor=page.next_cursor,
+                           filters=filters, sort_options=SORT_OPTIONS,
+                           colors=distinct_values(Product.color), sizes=distinct_values(Product.size))
 
-@app.route('/product/<int:id>')
+@bp.route('/product/<int:id>')
+@cached_page
 def product_detail(id):
     product = Product.query.get_or_404(id)
     return render_template('product_detail.html', product=product)
 
-@app.route('/cart')
+@bp.route('/search')
+@cached_page
+def search():
+    query = request.args.get('q', '').strip()
+    results = search_products(query, current_app.config['SEARCH_RESULTS_LIMIT'],
+                              current_app.config['SEARCH_RANK_CANDIDATES']) if query else []
+    return render_template('search.html', query=query, products=results)
+
+@bp.route('/cart')
 def cart():
-    cart = session.get('cart', {})
-    products = []
-    total = 0
-    for pid, qty in cart.items():
-        product = Product.query.get(int(pid))
-        if product:
-            products.append({'product': product, 'quantity': qty})
-            total += product.price * qty
-    whatsapp_number = get_whatsapp_number()
-    return render_template('cart.html', products=products, total=total, whatsapp_number=whatsapp_number)
+    resolved = resolve_session_cart(session)
+    whatsapp_link = generate_cart_order_link(get_whatsapp_number(), resolved) if resolved.items else None
+    return render_template('cart.html', products=resolved.items, total=resolved.total, whatsapp_link=whatsapp_link,
+                           cart_phone=session.get('cart_phone'), pending_phone=session.get('cart_link_phone'))
 
-@app.route('/add_to_cart/<int:id>')
+@bp.route('/add_to_cart/<int:id>')
 def add_to_cart(id):
-    cart = session.get('cart', {})
-    cart[str(id)] = cart.get(str(id), 0) + 1
-    session['cart'] = cart
+    add_item(session, id)
     flash('Product added to cart!')
-    return redirect(url_for('products'))
+    return redirect(url_for('main.products'))
 
-@app.route('/remove_from_cart/<int:id>')
+@bp.route('/remove_from_cart/<int:id>')
 def remove_from_cart(id):
-    cart = session.get('cart', {})
-    if str(id) in cart:
-        del cart[str(id)]
-    session['cart'] = cart
-    return redirect(url_for('cart'))
+    remove_item(session, id)
+    return redirect(url_for('main.cart'))
 
-@app.route('/custom_order', methods=['GET', 'POST'])
+@bp.route('/cart/link', methods=['POST'])
+def link_cart():
+    phone = normalise_phone(request.form.get('phone'))
+    if phone is None:
+        flash('Please enter a valid phone number.')
+        return redirect(url_for('main.cart'))
+    if not notifications_enabled(current_app.config):
+        flash('Saving carts is not available right now.')
+        return redirect(url_for('main.cart'))
+    if request_link_code(phone, current_app.secret_key):
+        wake_worker(current_app._get_current_object())
+        flash(f'We sent a 6-digit code to +{phone} on WhatsApp. Enter it below to save your cart.')
+    else:
+        flash('A code was sent to that number a moment ago. Please wait a minute before asking for another.')
+    session['cart_link_phone'] = phone
+    return redirect(url_for('main.cart'))
+
+@bp.route('/cart/link/verify', methods=['POST'])
+def verify_cart_link():
+    phone = session.get('cart_link_phone')
+    if not phone:
+        return redirect(url_for('main.cart'))
+    if not verify_link_code(phone, request.form.get('code'), current_app.secret_key):
+        flash('That code is wrong or has expired. Check WhatsApp or ask for a new code.')
+        return redirect(url_for('main.cart'))
+    session.pop('cart_link_phone', None)
+    count = link_cart_to_phone(session, phone)
+    flash(f'Your cart ({count} items) is now saved for +{phone}. Enter the same number on any device to see it.')
+    return redirect(url_for('main.cart'))
+
+@bp.route('/api/products')
+def api_products():
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as exc:
+        return json_response({'error': str(exc)}, 400)
+    etag = catalog_etag()
+    held = not_modified(etag)
+    if held:
+        return empty_response(held)
+    limit = request.args.get('limit', type=int) or current_app.config['PRODUCTS_PER_PAGE']
+    limit = max(1, min(limit, current_app.config['API_MAX_PAGE_SIZE']))
+    items, next_cursor = list_products(parse_catalog_args(request.args), request.args.get('cursor'),
+                                       limit, fields)
+    return json_response({'items': items, 'next_cursor': next_cursor}, etag=etag)
+
+@bp.route('/api/products/<int:id>')
+def api_product(id):
+    try:
+        fields = parse_fields(request.args.get('fields'))
+    except ValueError as exc:
+        return json_response({'error': str(exc)}, 400)
+    etag = catalog_etag(id)
+    held = not_modified(etag)
+    if held:
+        return empty_response(held)
+    product = get_product(id, fields)
+    if product is None:
+        return json_response({'error': 'Product not found'}, 404)
+    return json_response(product, etag=etag)
+
+@bp.route('/api/cart')
+def api_cart():
+    return json_response(cart_payload(resolve_session_cart(session)), private=True)
+
+def _cart_delta_response(id):
+    resolved = resolve_session_cart(session)
+    whatsapp_link = generate_cart_order_link(get_whatsapp_number(), resolved) if resolved.items else None
+    return json_response(cart_delta(resolved, id, whatsapp_link), private=True)
+
+@bp.route('/api/cart/add/<int:id>', methods=['POST'])
+def api_add_to_cart(id):
+    # JSON variant of add_to_cart for script.js: no redirect, no catalog re-render
+    add_item(session, id)
+    response = _cart_delta_response(id)
+    if str(id) not in session['cart']:  # resolve_session_cart pruned an unknown product
+        return json_response({'error': 'Product not found'}, 404)
+    return response
+
+@bp.route('/api/cart/remove/<int:id>', methods=['POST'])
+def api_remove_from_cart(id):
+    remove_item(session, id)
+    return _cart_delta_response(id)
+
+@bp.route('/custom_order', methods=['GET', 'POST'])
 def custom_order():
     if request.method == 'POST':
-        order = CustomOrder(
-            product_type=request.form['product_type'],
-            material=request.form.get('material'),
-            color=request.form.get('color'),
-            occasion=request.form.get('occasion'),
-            size=request.form.get('size'),
-            notes=request.form.get('notes'),
-            name=request.form['name'],
-            phone=request.form['phone']
-        )
-        db.session.add(order)
-        db.session.commit()
-        
-        # Generate WhatsApp link and redirect directly
         order_details = {
             'product_type': request.form['product_type'],
             'material': request.form.get('material'),
@@ -107,6 +240,11 @@ def custom_order():
             'name': request.form['name'],
             'phone': request.form['phone']
         }
+        # Twilio notifications are queued with the order and sent in the background
+        owner_number = get_whatsapp_number() if notifications_enabled(current_app.config) else None
+        create_custom_order(order_details, owner_number)
+        if owner_number:
+            wake_worker(current_app._get_current_object())
         
         # Get WhatsApp link for owner and redirect user directly
         whatsapp_link = send_custom_order_notification(order_details)
@@ -115,58 +253,66 @@ def custom_order():
         return redirect(whatsapp_link)
     return render_template('custom_order.html')
 
-@app.route('/about')
+@bp.route('/about')
 def about():
     return render_template('about.html')
 
-@app.route('/contact')
+@bp.route('/contact')
 def contact():
     whatsapp_number = get_whatsapp_number()
     return render_template('contact.html', whatsapp_number=whatsapp_number)
 
-@app.route('/admin/login', methods=['GET', 'POST'])
+@bp.route('/admin/login', methods=['GET', 'POST'])
 def admin_login():
     if request.method == 'POST':
         username = request.form['username']
         password = request.form['password']
+        # Rate-limit before the lookup and PBKDF2 so a credential flood can't pin the workers
+        retry_after = check_login(current_app, request.remote_addr, username)
+        if retry_after:
+            return (f'Too many login attempts. Try again in {retry_after} seconds.\n', 429,
+                    {'Retry-After': str(retry_after), 'Content-Type': 'text/plain; charset=utf-8'})
         admin = Admin.query.filter_by(username=username).first()
         if admin and check_password_hash(admin.password_hash, password):
+            login_succeeded(current_app, username)
             session['admin'] = True
-            return redirect(url_for('admin_dashboard'))
+            return redirect(url_for('main.admin_dashboard'))
         flash('Invalid credentials')
     return render_template('admin_login.html')
 
-@app.route('/admin/logout')
+@bp.route('/admin/logout')
 def admin_logout():
     session.pop('admin', None)
-    return redirect(url_for('home'))
+    return redirect(url_for('main.home'))
 
-@app.route('/admin/dashboard')
+@bp.route('/admin/dashboard')
 def admin_dashboard():
     if not session.get('admin'):
-        return redirect(url_for('admin_login'))
-    products = Product.query.all()
-    orders = CustomOrder.query.all()
-    return render_template('admin_dashboard.html', products=products, orders=orders)
+        return redirect(url_for('main.admin_login'))
+    filters = parse_catalog_args(request.args)
+    page = paginate_products(filters, request.args.get('cursor'), current_app.config['ADMIN_PRODUCTS_PER_PAGE'])
+    product_count = count_products(filters)
+    orders = paginate_orders(request.args.get('order_cursor'), current_app.config['ADMIN_ORDERS_PER_PAGE'])
+    stats = order_stats(current_app.config['DASHBOARD_STATS_DAYS'])
+    return render_template('admin_dashboard.html', products=page.items, next_cursor=page.next_cursor,
+                           filters=filters, product_count=product_count, orders=orders.items,
+                           next_order_cursor=orders.next_cursor, stats=stats,
+                           colors=distinct_values(Product.color), sizes=distinct_values(Product.size))
+
+@bp.route('/admin/metrics')
+def admin_metrics():
+    return metrics_response(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
 
-@app.route('/admin/settings', methods=['GET', 'POST'])
+@bp.route('/admin/settings', methods=['GET', 'POST'])
 def admin_settings():
     if not session.get('admin'):
-        return redirect(url_for('admin_login'))
-    settings = Settings.query.first()
-    
+        return redirect(url_for('main.admin_login'))
     if request.method == 'POST':
         form_type = request.form.get('form_type')
         
         # Handle WhatsApp number update
         if form_type == 'whatsapp':
-            new_number = request.form['whatsapp_number']
-            if settings:
-                settings.whatsapp_number = new_number
-            else:
-                settings = Settings(whatsapp_number=new_number)
-                db.session.add(settings)
-            db.session.commit()
+            update_settings(whatsapp_number=request.form['whatsapp_number'])
             flash('WhatsApp number updated successfully!')
             
         # Handle account settings update
@@ -177,7 +323,7 @@ def admin_settings():
             # Verify current password
             if not admin or not check_password_hash(admin.password_hash, current_password):
                 flash('Current password is incorrect!')
-                return redirect(url_for('admin_settings'))
+                return redirect(url_for('main.admin_settings'))
             
             # Update username if provided
             new_username = request.form.get('new_username', '').strip()
@@ -185,7 +331,7 @@ def admin_settings():
                 existing = Admin.query.filter_by(username=new_username).first()
                 if existing:
                     flash('Username already exists!')
-                    return redirect(url_for('admin_settings'))
+                    return redirect(url_for('main.admin_settings'))
                 admin.username = new_username
                 flash(f'Username updated to: {new_username}')
             
@@ -195,48 +341,51 @@ def admin_settings():
             if new_password:
                 if new_password != confirm_password:
                     flash('Passwords do not match!')
-                    return redirect(url_for('admin_settings'))
+                    return redirect(url_for('main.admin_settings'))
                 if len(new_password) < 6:
                     flash('Password must be at least 6 characters long!')
-                    return redirect(url_for('admin_settings'))
+                    return redirect(url_for('main.admin_settings'))
                 admin.password_hash = generate_password_hash(new_password)
                 flash('Password updated successfully!')
             
             db.session.commit()
         
-        return redirect(url_for('admin_dashboard'))
+        return redirect(url_for('main.admin_dashboard'))
     
-    current_number = settings.whatsapp_number if settings else ''
-    return render_template('admin_settings.html', current_number=current_number)
+    return render_template('admin_settings.html', current_number=get_whatsapp_number())
 
-@app.route('/admin/product/new', methods=['GET', 'POST'])
+@bp.route('/admin/product/new', methods=['GET', 'POST'])
 def admin_new_product():
     if not session.get('admin'):
-        return redirect(url_for('admin_login'))
+        return redirect(url_for('main.admin_login'))
     if request.method == 'POST':
         file = request.files.get('image')
         filename = None
+        variants = None
         if file:
-            filename = secure_filename(file.filename)
-            file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+            filename = save_upload(file, current_app.config['UPLOAD_FOLDER'])
+            variants = generate_variants(current_app.config['UPLOAD_FOLDER'], filename,
+                                         current_app.config['IMAGE_VARIANT_WIDTHS'])
         product = Product(
             name=request.form['name'],
             description=request.form['description'],
             price=float(request.form['price']),
             image=filename,
+            image_variants=variants,
             availability=request.form['availability'],
             size=request.form.get('size'),
             color=request.form.get('color')
         )
         db.session.add(product)
         db.session.commit()
-        return redirect(url_for('admin_dashboard'))
+        bump_catalog_version()
+        return redirect(url_for('main.admin_dashboard'))
     return render_template('admin_product_form.html', product=None)
 
-@app.route('/admin/product/edit/<int:id>', methods=['GET', 'POST'])
+@bp.route('/admin/product/edit/<int:id>', methods=['GET', 'POST'])
 def admin_edit_product(id):
     if not session.get('admin'):
-        return redirect(url_for('admin_login'))
+        return redirect(url_for('main.admin_login'))
     product = Product.query.get_or_404(id)
     if request.method == 'POST':
         product.name = request.form['name']
@@ -246,28 +395,196 @@ def admin_edit_product(id):
         product.size = request.form.get('size')
         product.color = request.form.get('color')
         file = request.files.get('image')
+        old_image, old_variants = product.image, product.image_variants
         if file:
-            filename = secure_filename(file.filename)
-            file.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+            filename = save_upload(file, current_app.config['UPLOAD_FOLDER'])
             product.image = filename
+            product.image_variants = generate_variants(current_app.config['UPLOAD_FOLDER'], filename,
+                                                       current_app.config['IMAGE_VARIANT_WIDTHS'])
         db.session.commit()
-        return redirect(url_for('admin_dashboard'))
+        if old_image and old_image != product.image:
+            release_image(current_app.config['UPLOAD_FOLDER'], old_image, old_variants)
+        bump_catalog_version()
+        return redirect(url_for('main.admin_dashboard'))
     return render_template('admin_product_form.html', product=product)
 
-@app.route('/admin/product/delete/<int:id>')
+@bp.route('/admin/product/delete/<int:id>', methods=['POST'])
 def admin_delete_product(id):
     if not session.get('admin'):
-        return redirect(url_for('admin_login'))
-    product = Product.query.get_or_404(id)
-    if product.image:
-        os.remove(os.path.join(app.config['UPLOAD_FOLDER'], product.image))
-    db.session.delete(product)
-    db.session.commit()
-    return redirect(url_for('admin_dashboard'))
+        return redirect(url_for('main.admin_login'))
+    result = bulk_update_products('delete', [id])
+    if not result.count:
+        abort(404)
+    # Files are only removed once no other product points at the same content
+    release_images_later(current_app._get_current_object(), result.images)
+    bump_catalog_version()
+    return redirect(url_for('main.admin_dashboard'))
+
+BULK_MESSAGES = {
+    'set_availability': 'Updated availability of {} products',
+    'adjust_price': 'Adjusted the price of {} products',
+    'delete': 'Deleted {} products',
+}
 
-@app.route('/uploads/<filename>')
+@bp.route('/admin/products/bulk', methods=['POST'])
+def admin_bulk_products():
+    """Apply one action to the ticked products, or to every product matching the filters"""
+    if not session.get('admin'):
+        return redirect(url_for('main.admin_login'))
+    action = request.form.get('action')
+    filters = parse_catalog_args(request.form)
+    if request.form.get('scope') == 'matching':
+        if action == 'delete' and not any(key != 'sort' for key in filters):
+            flash('Deleting every product is not allowed. Filter the list or tick the products to delete.')
+            return redirect(url_for('main.admin_dashboard', **filters))
+        ids = None
+    else:
+        ids = [int(value) for value in request.form.getlist('product_ids') if value.isdigit()]
+    value = request.form.get('percent') if action == 'adjust_price' else request.form.get('availability_value')
+    try:
+        result = bulk_update_products(action, ids, filters, value)
+    except ValueError as exc:
+        flash(str(exc))
+        return redirect(url_for('main.admin_dashboard', **filters))
+    release_images_later(current_app._get_current_object(), result.images)
+    if result.count:
+        bump_catalog_version()  # once per batch, however many products changed
+    flash(BULK_MESSAGES[action].format(result.count))
+    return redirect(url_for('main.admin_dashboard', **filters))
+
+@bp.route('/uploads/<filename>')
 def uploaded_file(filename):
-    return send_from_directory(app.config['UPLOAD_FOLDER'], filename)
+    if not is_content_addressed(filename):
+        return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
+    # Hashed names never change content, so browsers and CDNs can keep them forever
+    response = send_from_directory(current_app.config['UPLOAD_FOLDER'], filename, max_age=31536000, etag=False)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+def image_srcset(product, kind='fallback'):
+    """Build a srcset string from a product's recorded image variants"""
+    variants = load_variants(product.image_variants).get(kind, {})
+    return ', '.join(f"{url_for('main.uploaded_file', filename=name)} {width}w"
+                     for width, name in sorted(variants.items(), key=lambda item: int(item[0])))
+
+@click.command('backfill-images')
+@with_appcontext
+def backfill_images():
+    """Generate resized/WebP variants for product images already in uploads/"""
+    products = Product.query.filter(Product.image.isnot(None), Product.image_variants.is_(None)).all()
+    done = 0
+    for product in products:
+        variants = generate_variants(current_app.config['UPLOAD_FOLDER'], product.image,
+                                     current_app.config['IMAGE_VARIANT_WIDTHS'])
+        if variants:
+            product.image_variants = variants
+            done += 1
+        else:
+            print(f"✗ Skipped: {product.name} ({product.image})")
+    db.session.commit()
+    if done:
+        bump_catalog_version()
+    print(f"✅ Generated image variants for {done} of {len(products)} products")
+
+@click.command('hash-uploads')
+@with_appcontext
+def hash_uploads():
+    """Move legacy product images into content-addressed storage"""
+    names = [row[0] for row in db.session.query(Product.image).filter(Product.image.isnot(None)).distinct()]
+    moved = 0
+    for name in names:
+        if is_content_addressed(name):
+            continue
+        try:
+            hashed = store_existing(current_app.config['UPLOAD_FOLDER'], name)
+        except FileNotFoundError:
+            print(f"✗ Missing: {name}")
+            continue
+        variants = generate_variants(current_app.config['UPLOAD_FOLDER'], hashed,
+                                     current_app.config['IMAGE_VARIANT_WIDTHS'])
+        old_variants = db.session.query(Product.image_variants).filter(Product.image == name).limit(1).scalar()
+        Product.query.filter(Product.image == name).update(
+            {Product.image: hashed, Product.image_variants: variants}, synchronize_session=False)
+        db.session.commit()
+        release_image(current_app.config['UPLOAD_FOLDER'], name, old_variants)
+        moved += 1
+        print(f"✓ {name} -> {hashed}")
+    if moved:
+        bump_catalog_version()
+    print(f"✅ Moved {moved} images into content-addressed storage")
+
+@click.command('rebuild-search')
+@with_appcontext
+def rebuild_search_command():
+    """Re-index all products in the FTS5 search table"""
+    if not ensure_search_index():
+        print("✗ This SQLite build has no FTS5 support; search falls back to name matching")
+        return
+    count = rebuild_search_index()
+    print(f"✅ Indexed {count} products for search")
+
+@click.command('notification-worker')
+@with_appcontext
+@click.option('--once', is_flag=True, help='Send everything that is due, then exit')
+def notification_worker_command(once):
+    """Send queued WhatsApp notifications (use with NOTIFICATION_WORKER=off)"""
+    transport = make_transport(current_app.config)
+    if transport is None:
+        print("✗ No notification transport configured (set TWILIO_* or NOTIFICATION_TRANSPORT=log)")
+        return
+    while True:
+        sent = drain_outbox(db.engine, transport, current_app.config)
+        transport.close()
+        if once:
+            print(f"✅ Handled {sent} messages; outbox: {outbox_counts()}")
+            return
+        time.sleep(current_app.config['NOTIFICATION_POLL_SECONDS'])
+
+@click.command('purge-sessions')
+@with_appcontext
+def purge_sessions_command():
+    """Delete expired server-side sessions now (web workers also do this in the background)"""
+    removed = purge_expired_sessions(db.engine)
+    print(f"✅ Removed {removed} expired sessions")
+
+@click.command('archive-orders')
+@with_appcontext
+@click.option('--days', type=int, help='Archive orders older than this (default ORDER_ARCHIVE_DAYS)')
+def archive_orders_command(days):
+    """Move old custom orders into custom_order_archive (use with ORDER_ARCHIVE_WORKER=off)"""
+    days = days if days is not None else current_app.config['ORDER_ARCHIVE_DAYS']
+    if not days:
+        print("✗ Set ORDER_ARCHIVE_DAYS or pass --days")
+        return
+    moved = archive_orders(db.engine, days, current_app.config['ORDER_ARCHIVE_BATCH'])
+    print(f"✅ Archived {moved} orders older than {days} days")
+
+@click.command('rebuild-rollups')
+@with_appcontext
+def rebuild_rollups_command():
+    """Recount the daily order rollups from live and archived orders"""
+    rows = rebuild_order_rollups()
+    print(f"✅ Rebuilt {rows} daily rollup rows")
+
+@click.command('build-assets')
+@with_appcontext
+def build_assets_command():
+    """Fingerprint and precompress static CSS/JS (picked up on next start)"""
+    manifest = build_assets(current_app.static_folder)
+    for name, hashed in manifest.items():
+        print(f"✓ {name} -> {hashed}")
+    print(f"✅ Built {len(manifest)} assets")
+
+@click.command('bootstrap')
+@with_appcontext
+def bootstrap_command():
+    """Create or upgrade the database and seed default rows (run once per deploy)"""
+    bootstrap()
+    print("✅ Database ready")
 
 if __name__ == '__main__':
-    app.run(debug=False)
\ No newline at end of file
+    app = create_app()
+    with app.app_context():
+        bootstrap()
+    app.run(debug=False)
@@ -0,0 +1,135 @@
+"""
+Asset Service Module
+Fingerprinted, precompressed copies of the static CSS/JS bundle.
+
+`flask --app app build-assets` writes static/dist/<name>.<hash>.<ext> plus
+.gz (and .br when the brotli package is installed) copies and a
+manifest.json. When the manifest exists, url_for('static', ...) emits the
+hashed names and the static route serves the best precompressed variant
+with far-future cache headers; without it the plain files are used.
+
+build_stamp() identifies the deployed build (templates, code and asset
+manifest) so page and API ETags stop matching after a deploy.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip copies are always built
+    brotli = None
+
+ASSET_FILES = ('style.css', 'script.js')
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+ONE_YEAR = 31536000
+
+
+def build_assets(static_folder, files=ASSET_FILES):
+    """
+    Fingerprint and precompress static assets
+
+    Args:
+        static_folder (str): app.static_folder
+        files (iterable): asset paths relative to static_folder
+
+    Returns:
+        dict: manifest mapping original name -> hashed name (relative to static/)
+    """
+    dist = os.path.join(static_folder, DIST_DIR)
+    os.makedirs(dist, exist_ok=True)
+    manifest = {}
+    for name in files:
+        with open(os.path.join(static_folder, name), 'rb') as source:
+            data = source.read()
+        stem, ext = os.path.splitext(name)
+        hashed = f'{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+        target = os.path.join(dist, hashed)
+        with open(target, 'wb') as out:
+            out.write(data)
+        with open(target + '.gz', 'wb') as out:
+            out.write(gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(target + '.br', 'wb') as out:
+                out.write(brotli.compress(data, quality=11))
+        manifest[name] = f'{DIST_DIR}/{hashed}'
+    with open(os.path.join(dist, MANIFEST_NAME), 'w') as out:
+        json.dump(manifest, out, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(static_folder):
+    """Read the asset manifest, or return an empty one if it was never built"""
+    try:
+        with open(os.path.join(static_folder, DIST_DIR, MANIFEST_NAME)) as source:
+            return json.load(source)
+    except (OSError, ValueError):
+        return {}
+
+
+def build_stamp(app, manifest):
+    """
+    Short hash identifying this deploy, for ETags
+
+    Uses RELEASE_ID when set, otherwise the newest modification time of
+    the templates and the app's Python modules. Both are the same in every
+    worker and survive restarts, so ETags only change when a deploy does.
+    The asset manifest is always included, since rebuilt assets get new
+    hashed names that old pages would still reference.
+    """
+    release = app.config.get('RELEASE_ID')
+    if not release:
+        newest = 0
+        for folder, suffix in ((app.root_path, '.py'), (os.path.join(app.root_path, app.template_folder), '')):
+            try:
+                entries = list(os.scandir(folder))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_file() and entry.name.endswith(suffix):
+                    newest = max(newest, entry.stat().st_mtime_ns)
+        release = str(newest)
+    key = release + json.dumps(manifest, sort_keys=True)
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+
+def init_assets(app):
+    """Rewrite url_for('static') to hashed names and serve precompressed copies"""
+    manifest = load_manifest(app.static_folder)
+    app.extensions['asset_manifest'] = manifest
+    app.extensions['build_stamp'] = build_stamp(app, manifest)
+    if not manifest:
+        return
+    hashed_names = set(manifest.values())
+
+    @app.url_defaults
+    def fingerprint_static(endpoint, values):
+        if endpoint == 'static' and values.get('filename') in manifest:
+            values['filename'] = manifest[values['filename']]
+
+    def serve_static(filename):
+        if filename not in hashed_names:
+            return app.send_static_file(filename)
+        mimetype = mimetypes.guess_type(filename)[0]
+        folder = os.path.join(app.static_folder, DIST_DIR)
+        name = os.path.basename(filename)
+        encoding = None
+        for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if request.accept_encodings[candidate] and os.path.exists(os.path.join(folder, name + suffix)):
+                encoding, name = candidate, name + suffix
+                break
+        response = send_from_directory(folder, name, mimetype=mimetype, max_age=ONE_YEAR)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+    app.view_functions['static'] = serve_static
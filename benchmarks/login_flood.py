@@ -0,0 +1,139 @@
+"""
+Login-flood load test
+
+Runs gunicorn against a throwaway database and measures storefront latency
+(/products and /product/<id>) on its own and while flood threads POST
+wrong passwords to /admin/login as fast as they can, once with
+LOGIN_THROTTLE_ENABLED=False and once with it on. Without the throttle
+every attempt costs a PBKDF2 hash and customer requests queue behind
+them; with it, rejected attempts return 429 before any hashing.
+
+Both flood shapes guess passwords for the real admin account, so every
+unthrottled attempt reaches check_password_hash:
+  ip    from one client IP (stopped by the per-IP bucket)
+  user  from rotating X-Forwarded-For IPs (stopped by the per-username bucket)
+
+Usage: python benchmarks/login_flood.py [--seconds 10] [--workers 2] [--clients 4]
+                                        [--flooders 16] [--flood ip|user]
+"""
+
+import argparse
+import itertools
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+from routes import ROOT, free_port, summarize
+
+
+def fetch(url, data=None, headers=None):
+    request = Request(url, data=urlencode(data).encode() if data else None, headers=headers or {})
+    try:
+        with urlopen(request, timeout=60) as response:
+            response.read()
+            return response.status
+    except HTTPError as exc:
+        exc.read()
+        return exc.code
+
+
+def storefront(base, stop, latencies, product_count):
+    rnd = random.Random(threading.get_ident())
+    while not stop.is_set():
+        path = '/products' if rnd.random() < 0.5 else f'/product/{rnd.randint(1, product_count)}'
+        started = time.perf_counter()
+        fetch(base + path)
+        latencies.append(time.perf_counter() - started)
+
+
+def flooder(base, stop, codes, shape):
+    counter = itertools.count()
+    while not stop.is_set():
+        n = next(counter)
+        headers = {}
+        if shape == 'user':
+            headers['X-Forwarded-For'] = f'10.{n // 65536 % 256}.{n // 256 % 256}.{n % 256}'
+        status = fetch(base + '/admin/login', {'username': 'Nakha', 'password': f'guess{n}'}, headers)
+        codes[status] += 1
+
+
+def run_phase(base, args, flood):
+    stop = threading.Event()
+    latencies, codes = [], Counter()
+    threads = [threading.Thread(target=storefront, args=(base, stop, latencies, 6)) for _ in range(args.clients)]
+    if flood:
+        threads += [threading.Thread(target=flooder, args=(base, stop, codes, args.flood))
+                    for _ in range(args.flooders)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    result = summarize(latencies, args.seconds)
+    if flood:
+        result['login_attempts_per_s'] = round(sum(codes.values()) / args.seconds, 1)
+        result['login_status_codes'] = dict(codes)
+    return result
+
+
+def run_server(env, args):
+    port = free_port()
+    base = f'http://127.0.0.1:{port}'
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-w', str(args.workers), '-b', f'127.0.0.1:{port}',
+         '--timeout', '120', '--log-level', 'warning', 'app:create_app()'], cwd=ROOT, env=env)
+    try:
+        deadline = time.time() + 60
+        while True:
+            try:
+                fetch(base + '/about')
+                break
+            except OSError:
+                if time.time() > deadline or server.poll() is not None:
+                    raise RuntimeError('gunicorn did not start')
+                time.sleep(0.2)
+        return {'baseline': run_phase(base, args, False), 'flood': run_phase(base, args, True)}
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=int, default=10, help='duration of each phase')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--clients', type=int, default=4, help='concurrent storefront clients')
+    parser.add_argument('--flooders', type=int, default=16, help='concurrent login flood threads')
+    parser.add_argument('--flood', choices=('ip', 'user'), default='ip')
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f'sqlite:///{os.path.join(tmp, "bench.db")}',
+                   THROTTLE_DB=os.path.join(tmp, 'throttle.db'), NOTIFICATION_TRANSPORT='off',
+                   PROXY_FIX_X_FOR='1', PAGE_CACHE_ENABLED='False')
+        subprocess.run([sys.executable, 'init_data.py'], cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+        for enabled in ('False', 'True'):
+            label = 'throttle on' if enabled == 'True' else 'throttle off'
+            results[label] = run_server(dict(env, LOGIN_THROTTLE_ENABLED=enabled), args)
+
+    print(f"\nStorefront latency, {args.workers} workers, {args.clients} clients, "
+          f"{args.flooders} '{args.flood}' flooders, {args.seconds}s per phase")
+    print(f"  {'':<14}{'phase':<10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'logins/s':>10}  codes")
+    for label, phases in results.items():
+        for phase, row in phases.items():
+            print(f"  {label:<14}{phase:<10}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}"
+                  f"{row['rps']:>10}{row.get('login_attempts_per_s', '-'):>10}  {row.get('login_status_codes', '')}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,312 @@
+"""
+Route-level latency benchmark
+
+Seeds Product and CustomOrder at each dataset size into a throwaway SQLite
+database and drives every storefront/admin route:
+
+  * through the Flask test client (single process; also counts SQL
+    statements per request), and
+  * through a locally spawned gunicorn with concurrent HTTP clients.
+
+Reports p50/p95/p99 latency, requests per second and SQL queries per
+request, and writes machine-readable JSON that can be diffed between
+releases.
+
+Usage: python benchmarks/routes.py [--sizes 100,10000,100000] [--requests 200]
+                                   [--mode client|gunicorn|both] [--concurrency 8]
+                                   [--workers 2] [--output bench_routes.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from http.cookiejar import CookieJar
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import HTTPCookieProcessor, HTTPRedirectHandler, build_opener
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CART_ITEMS = 8
+ADMIN_LOGIN = {'username': 'Nakha', 'password': '123456'}
+ORDER_FORM = {'product_type': 'gift', 'material': 'jute', 'color': 'natural', 'occasion': 'Diwali',
+              'size': 'M', 'notes': 'benchmark', 'name': 'Bench', 'phone': '9000000000'}
+
+WORDS = ('basket', 'storage', 'laundry', 'gift', 'picnic', 'jute', 'bamboo', 'woven', 'natural',
+         'large', 'small', 'decor', 'wall', 'pet', 'tray', 'hamper', 'festival', 'planter')
+COLORS = ('Natural', 'Brown', 'Beige', 'Red', 'Green')
+SIZES = ('Small (20cm)', 'Medium (30cm)', 'Large (40cm)')
+OCCASIONS = (None, 'Diwali', 'Wedding', 'Birthday', 'Eid')
+
+
+# -- routes ------------------------------------------------------------------
+
+def route_plan(product_count):
+    """(name, method, path factory, form, session kind) for every benchmarked route"""
+    rnd = random.Random(7)
+    return [
+        ('home', 'GET', lambda: '/', None, None),
+        ('products', 'GET', lambda: '/products', None, None),
+        ('product_detail', 'GET', lambda: f'/product/{rnd.randint(1, product_count)}', None, None),
+        ('search', 'GET', lambda: '/search?' + urlencode({'q': search_query(rnd)}), None, None),
+        ('cart', 'GET', lambda: '/cart', None, 'cart'),
+        ('custom_order_post', 'POST', lambda: '/custom_order', ORDER_FORM, None),
+        ('admin_dashboard', 'GET', lambda: '/admin/dashboard', None, 'admin'),
+    ]
+
+
+def search_query(rnd):
+    """A common word, an as-you-type prefix or a two-word phrase; varied so most miss the page cache"""
+    first, second = rnd.sample(WORDS, 2)
+    return rnd.choice((first, first[:3], f'{first} {second}', f'{first} {second[:3]}'))
+
+
+def summarize(latencies, wall, queries=None):
+    latencies = sorted(latencies)
+
+    def pct(p):
+        return round(latencies[min(len(latencies) - 1, int(len(latencies) * p / 100))] * 1000, 3)
+
+    result = {'requests': len(latencies), 'p50_ms': pct(50), 'p95_ms': pct(95), 'p99_ms': pct(99),
+              'rps': round(len(latencies) / wall, 1) if wall else None}
+    if queries is not None:
+        result['sql_queries_per_request'] = round(sum(queries) / len(queries), 2)
+    return result
+
+
+# -- seeding -----------------------------------------------------------------
+
+def seed(size):
+    """Bulk-insert `size` products and `size` custom orders (needs app context)"""
+    from models import db, Product, CustomOrder
+    from settings_service import bump_catalog_version
+
+    rnd = random.Random(size)
+    now = datetime.utcnow()
+    for start in range(0, size, 5000):
+        count = min(5000, size - start)
+        db.session.execute(Product.__table__.insert(), [{
+            'name': ' '.join(rnd.sample(WORDS, 3)).title() + f' {start + i}',
+            'description': ' '.join(rnd.choices(WORDS, k=30)),
+            'price': round(rnd.uniform(5, 500), 2),
+            'availability': rnd.choice(('available', 'available', 'out_of_stock', 'made_to_order')),
+            'size': rnd.choice(SIZES), 'color': rnd.choice(COLORS),
+        } for i in range(count)])
+        db.session.execute(CustomOrder.__table__.insert(), [{
+            'product_type': rnd.choice(('basket', 'gift', 'storage')), 'material': 'jute',
+            'occasion': rnd.choice(OCCASIONS), 'name': f'Customer {start + i}', 'phone': '9000000000',
+            'created_at': now - timedelta(minutes=rnd.randint(0, 60 * 24 * 365)),
+        } for i in range(count)])
+        db.session.commit()
+    bump_catalog_version()
+
+
+# -- test client mode --------------------------------------------------------
+
+def run_test_client(app, size, requests):
+    from sqlalchemy import event
+    from models import db
+
+    counter = [0]
+    with app.app_context():
+        engine = db.engine
+
+    def count(*args):
+        counter[0] += 1
+
+    event.listen(engine, 'before_cursor_execute', count)
+    results = {}
+    try:
+        for name, method, path, form, kind in route_plan(size):
+            client = app.test_client()
+            if kind == 'admin':
+                with client.session_transaction() as sess:
+                    sess['admin'] = True
+            elif kind == 'cart':
+                rnd = random.Random(1)
+                with client.session_transaction() as sess:
+                    sess['cart'] = {str(rnd.randint(1, size)): rnd.randint(1, 3) for _ in range(CART_ITEMS)}
+            latencies, queries = [], []
+            started = time.perf_counter()
+            for _ in range(requests):
+                counter[0] = 0
+                t0 = time.perf_counter()
+                if method == 'POST':
+                    response = client.post(path(), data=form)
+                else:
+                    response = client.get(path())
+                latencies.append(time.perf_counter() - t0)
+                queries.append(counter[0])
+                if response.status_code >= 400:
+                    raise RuntimeError(f'{name}: HTTP {response.status_code}')
+            results[name] = summarize(latencies, time.perf_counter() - started, queries)
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+    return results
+
+
+# -- gunicorn mode -----------------------------------------------------------
+
+class NoRedirect(HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def make_client(base, kind, size):
+    """An opener with its own cookie jar, pre-loaded with a cart or admin login"""
+    opener = build_opener(HTTPCookieProcessor(CookieJar()), NoRedirect)
+
+    def fetch(path, form=None):
+        data = urlencode(form).encode() if form else None
+        try:
+            with opener.open(base + path, data=data, timeout=30) as response:
+                response.read()
+                return response.status
+        except HTTPError as exc:  # 3xx surface here because redirects are not followed
+            exc.read()
+            if exc.code >= 400:
+                raise
+            return exc.code
+
+    if kind == 'admin':
+        fetch('/admin/login', ADMIN_LOGIN)
+    elif kind == 'cart':
+        rnd = random.Random(threading.get_ident())
+        for _ in range(CART_ITEMS):
+            fetch(f'/add_to_cart/{rnd.randint(1, size)}')
+    return fetch
+
+
+def run_gunicorn(env, size, requests, concurrency, workers):
+    port = free_port()
+    base = f'http://127.0.0.1:{port}'
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}',
+         '--log-level', 'warning', 'app:create_app()'],
+        cwd=ROOT, env=env)
+    try:
+        deadline = time.time() + 60
+        while True:
+            try:
+                make_client(base, None, size)('/about')
+                break
+            except OSError:
+                if time.time() > deadline or server.poll() is not None:
+                    raise RuntimeError('gunicorn did not start')
+                time.sleep(0.2)
+
+        results = {}
+        for name, method, path, form, kind in route_plan(size):
+            clients = [make_client(base, kind, size) for _ in range(concurrency)]
+            per_client = max(1, requests // concurrency)
+
+            def drive(fetch):
+                latencies = []
+                for _ in range(per_client):
+                    t0 = time.perf_counter()
+                    fetch(path(), form if method == 'POST' else None)
+                    latencies.append(time.perf_counter() - t0)
+                return latencies
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(concurrency) as pool:
+                latencies = [lat for chunk in pool.map(drive, clients) for lat in chunk]
+            results[name] = summarize(latencies, time.perf_counter() - started)
+        return results
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+# -- orchestration -----------------------------------------------------------
+
+def run_size(args):
+    """Child process: seed one dataset size and run the requested modes"""
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    from app import create_app, bootstrap
+    app = create_app()
+
+    with app.app_context():
+        bootstrap()
+        started = time.perf_counter()
+        seed(args.size)
+        seed_seconds = round(time.perf_counter() - started, 2)
+
+    result = {'size': args.size, 'seed_seconds': seed_seconds}
+    if args.mode in ('client', 'both'):
+        result['test_client'] = run_test_client(app, args.size, args.requests)
+    if args.mode in ('gunicorn', 'both'):
+        result['gunicorn'] = run_gunicorn(dict(os.environ), args.size, args.requests,
+                                          args.concurrency, args.workers)
+    print(json.dumps(result))
+
+
+def print_table(results):
+    for result in results:
+        print(f"\n== {result['size']:,} products / orders (seeded in {result['seed_seconds']}s) ==")
+        for mode in ('test_client', 'gunicorn'):
+            if mode not in result:
+                continue
+            print(f"  [{mode}]")
+            print(f"    {'route':<20}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}{'SQL/req':>10}")
+            for route, row in result[mode].items():
+                sql = row.get('sql_queries_per_request', '-')
+                print(f"    {route:<20}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}"
+                      f"{row['rps']:>10}{sql:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='100,10000,100000', help='comma-separated dataset sizes')
+    parser.add_argument('--requests', type=int, default=200, help='requests per route')
+    parser.add_argument('--mode', choices=('client', 'gunicorn', 'both'), default='both')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent HTTP clients (gunicorn mode)')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--output', default='bench_routes.json', help='JSON results file')
+    parser.add_argument('--size', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.size is not None:
+        run_size(args)
+        return
+
+    results = []
+    for size in (int(value) for value in args.sizes.split(',')):
+        with tempfile.TemporaryDirectory() as tmp:
+            # Fresh throttle buckets per size: the admin logins would otherwise exhaust the per-IP
+            # bucket in the deploy's instance/throttle.db and fail later runs with 429
+            env = dict(os.environ, DATABASE_URL=f'sqlite:///{os.path.join(tmp, "bench.db")}',
+                       THROTTLE_DB=os.path.join(tmp, 'throttle.db'), NOTIFICATION_TRANSPORT='off')
+            child = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--size', str(size), '--mode', args.mode,
+                 '--requests', str(args.requests), '--concurrency', str(args.concurrency),
+                 '--workers', str(args.workers)],
+                env=env, stdout=subprocess.PIPE, check=True, text=True)
+            results.append(json.loads(child.stdout.strip().splitlines()[-1]))
+
+    report = {'generated_at': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+              'python': sys.version.split()[0], 'requests_per_route': args.requests,
+              'concurrency': args.concurrency, 'gunicorn_workers': args.workers, 'results': results}
+    with open(args.output, 'w') as out:
+        json.dump(report, out, indent=2)
+    print_table(results)
+    print(f"\nWrote {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+Concurrent SQLite writer benchmark
+
+Simulates a burst of custom_order submissions from several gunicorn workers
+while other workers read the order table, once with SQLite's default
+settings (rollback journal, implicit deferred transactions) and once with
+the SQLITE_PRAGMAS profile and BEGIN IMMEDIATE write path from models.py.
+
+Usage: python benchmarks/sqlite_writers.py [--writers 8] [--readers 4] [--seconds 5] [--json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, select  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+import config  # noqa: E402
+from models import db, CustomOrder, apply_sqlite_profile, write_transaction  # noqa: E402
+
+ORDER = {
+    'product_type': 'basket', 'material': 'jute', 'color': 'natural', 'occasion': 'wedding',
+    'size': 'M', 'notes': 'benchmark', 'name': 'Bench', 'phone': '9000000000',
+}
+
+
+def make_engine(url, tuned):
+    engine = create_engine(url, **(config.SQLALCHEMY_ENGINE_OPTIONS if tuned else {}))
+    if tuned:
+        apply_sqlite_profile(engine, config.SQLITE_PRAGMAS)
+    return engine
+
+
+def writer(url, tuned, deadline, results):
+    engine = make_engine(url, tuned)
+    insert = CustomOrder.__table__.insert().values(**ORDER)
+    ok = errors = 0
+    latencies = []
+    while time.time() < deadline:
+        start = time.perf_counter()
+        try:
+            if tuned:
+                with write_transaction(engine) as conn:
+                    conn.execute(insert)
+            else:
+                with engine.begin() as conn:
+                    conn.execute(insert)
+            ok += 1
+            latencies.append(time.perf_counter() - start)
+        except OperationalError:
+            errors += 1
+    results.put(('writer', ok, errors, latencies))
+
+
+def reader(url, tuned, deadline, interval, results):
+    engine = make_engine(url, tuned)
+    query = select(CustomOrder.product_type, func.count()).group_by(CustomOrder.product_type)
+    ok = errors = 0
+    while time.time() < deadline:
+        try:
+            with engine.connect() as conn:
+                conn.execute(query).all()
+            ok += 1
+        except OperationalError:
+            errors += 1
+        time.sleep(interval)
+    results.put(('reader', ok, errors, []))
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def run(tuned, writers, readers, seconds, read_interval):
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f'sqlite:///{os.path.join(tmp, "bench.db")}'
+        setup = make_engine(url, tuned)
+        db.metadata.create_all(setup)
+        setup.dispose()
+
+        results = multiprocessing.Queue()
+        deadline = time.time() + seconds
+        procs = [multiprocessing.Process(target=writer, args=(url, tuned, deadline, results)) for _ in range(writers)]
+        procs += [multiprocessing.Process(target=reader, args=(url, tuned, deadline, read_interval, results))
+                  for _ in range(readers)]
+        for proc in procs:
+            proc.start()
+        collected = [results.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+
+    inserts = sum(r[1] for r in collected if r[0] == 'writer')
+    latencies = [lat for r in collected if r[0] == 'writer' for lat in r[3]]
+    return {
+        'profile': 'tuned' if tuned else 'default',
+        'inserts_per_sec': round(inserts / seconds, 1),
+        'write_errors': sum(r[2] for r in collected if r[0] == 'writer'),
+        'reads_per_sec': round(sum(r[1] for r in collected if r[0] == 'reader') / seconds, 1),
+        'read_errors': sum(r[2] for r in collected if r[0] == 'reader'),
+        'write_p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'write_p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'write_p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--read-interval', type=float, default=0.01,
+                        help='pause between reads per reader, so both profiles see the same read load')
+    parser.add_argument('--json', action='store_true', help='print machine-readable results only')
+    args = parser.parse_args()
+
+    rows = [run(tuned, args.writers, args.readers, args.seconds, args.read_interval) for tuned in (False, True)]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds}s per profile\n")
+    header = list(rows[0])
+    print('  '.join(f'{h:>15}' for h in header))
+    for row in rows:
+        print('  '.join(f'{str(row[h]):>15}' for h in header))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Startup-time benchmark
+
+Measures what every gunicorn worker pays before it can serve a request:
+
+  * `import app` plus `create_app()` in a fresh interpreter (median of
+    several runs), with the number of SQL statements executed meanwhile,
+  * the one-off `bootstrap` (schema, search index, default rows), and
+  * gunicorn boot until every worker has answered, with and without
+    --preload (forked workers skip the import entirely).
+
+Runs against a throwaway bootstrapped SQLite database.
+
+Usage: python benchmarks/startup.py [--runs 7] [--workers 4]
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.request import urlopen
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter; prints import + create_app() seconds and SQL statement count
+IMPORT_PROBE = """
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+statements = []
+event.listen(Engine, 'before_cursor_execute', lambda *args: statements.append(1))
+started = time.perf_counter()
+import app
+app.create_app()
+print(time.perf_counter() - started, len(statements))
+"""
+
+# Each worker reports its pid so we can tell when all of them are up
+PID_APP = """
+import os
+from app import create_app
+app = create_app()
+app.add_url_rule('/_pid', 'bench_pid', lambda: str(os.getpid()))
+"""
+
+
+def run_python(code, env):
+    output = subprocess.run([sys.executable, '-c', code], cwd=ROOT, env=env, check=True,
+                            stdout=subprocess.PIPE, text=True).stdout
+    return output.split()
+
+
+def measure_import(env, runs):
+    samples = [run_python(IMPORT_PROBE, env) for _ in range(runs)]
+    return statistics.median(float(seconds) for seconds, _ in samples), int(samples[-1][1])
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def measure_gunicorn(env, workers, preload, tmp):
+    """Seconds from spawning gunicorn until `workers` distinct pids have answered"""
+    with open(os.path.join(tmp, 'bench_startup_app.py'), 'w') as out:
+        out.write(PID_APP)
+    config = os.path.join(tmp, 'bench_gunicorn_conf.py')  # empty: ignore gunicorn.conf.py, compare both modes
+    open(config, 'w').close()
+    port = free_port()
+    command = [sys.executable, '-m', 'gunicorn', '-w', str(workers), '-b', f'127.0.0.1:{port}',
+               '--log-level', 'warning', '--pythonpath', f'{ROOT},{tmp}', '-c', config]
+    if preload:
+        command.append('--preload')
+    started = time.perf_counter()
+    server = subprocess.Popen(command + ['bench_startup_app:app'], cwd=ROOT, env=env)
+    seen = set()
+    try:
+        deadline = time.time() + 60
+        while len(seen) < workers:
+            if time.time() > deadline or server.poll() is not None:
+                raise RuntimeError('gunicorn did not start')
+            try:
+                with urlopen(f'http://127.0.0.1:{port}/_pid', timeout=5) as response:
+                    seen.add(response.read())
+            except OSError:
+                time.sleep(0.01)
+        return time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=7, help='fresh-interpreter imports to time')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn worker processes')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f'sqlite:///{os.path.join(tmp, "bench.db")}',
+                   NOTIFICATION_TRANSPORT='off', PYTHONPATH=ROOT)
+        started = time.perf_counter()
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'bootstrap'], cwd=ROOT, env=env,
+                       check=True, stdout=subprocess.DEVNULL)
+        bootstrap_seconds = time.perf_counter() - started
+
+        import_seconds, statements = measure_import(env, args.runs)
+        cold = measure_gunicorn(env, args.workers, False, tmp)
+        preloaded = measure_gunicorn(env, args.workers, True, tmp)
+
+    rows = [(f'import + create_app (median of {args.runs})', import_seconds, f'{statements} SQL statements'),
+            ('flask bootstrap (one-off)', bootstrap_seconds, 'includes interpreter start'),
+            (f'gunicorn, {args.workers} workers serving', cold, 'without --preload'),
+            (f'gunicorn, {args.workers} workers serving', preloaded, 'with --preload')]
+    for label, seconds, note in rows:
+        print(f"{label:<34}{seconds * 1000:9.1f} ms   {note}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Local stub of the Twilio Messages API
+
+Accepts POST /2010-04-01/Accounts/<sid>/Messages.json and records each
+message, so the notification outbox can be exercised without a Twilio
+account. Point the app at it with TWILIO_API_BASE=http://127.0.0.1:8099.
+
+Usage: python benchmarks/stub_twilio.py [--port 8099] [--fail-rate 0.2] [--latency 0.05]
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+
+class StubTwilio(ThreadingHTTPServer):
+    """HTTP server that keeps every accepted message in .messages"""
+
+    def __init__(self, address, fail_rate=0.0, latency=0.0):
+        super().__init__(address, StubHandler)
+        self.fail_rate = fail_rate
+        self.latency = latency
+        self.messages = []
+        self.failures = 0
+        self.lock = threading.Lock()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        with self.server.lock:
+            if random.random() < self.server.fail_rate:
+                self.server.failures += 1
+                self._reply(503, {'message': 'stub failure'})
+                return
+            self.server.messages.append(form)
+            sid = f'SM{len(self.server.messages):032d}'
+        self._reply(201, {'sid': sid, 'to': form.get('To'), 'status': 'queued'})
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='fraction of requests answered with 503')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds to wait before answering')
+    args = parser.parse_args()
+    server = StubTwilio(('127.0.0.1', args.port), args.fail_rate, args.latency)
+    print(f'Stub Twilio API on http://127.0.0.1:{args.port}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f'\n{len(server.messages)} messages accepted, {server.failures} failures injected')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+"""
+Cart Service Module
+Resolves the session cart against the database in a single query.
+
+The session only stores {product_id: quantity}. Every page that shows or
+checks out the cart goes through resolve_session_cart() so prices and
+totals are computed the same way everywhere. A visitor can link the cart
+to their phone number (saved_cart), after which every change is mirrored
+there and the same cart follows them to their other devices. Linking
+needs a one-time code sent to that number on WhatsApp, so nobody can
+read or overwrite another customer's cart by typing their number.
+"""
+
+import hashlib
+import hmac
+import json
+import secrets
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select
+
+from models import db, Product, SavedCart, CartLinkCode, write_transaction
+from notification_service import enqueue_cart_link_code
+from whatsapp_service import format_phone_number
+
+CODE_TTL = timedelta(minutes=10)
+CODE_RESEND_SECONDS = 60
+CODE_MAX_ATTEMPTS = 5
+
+link_codes = CartLinkCode.__table__
+
+ResolvedCart = namedtuple('ResolvedCart', ['items', 'total', 'count'])
+
+
+def _normalise(cart):
+    """Turn the raw session cart into {int id: positive int qty}, skipping junk"""
+    quantities = {}
+    for pid, qty in (cart or {}).items():
+        try:
+            pid, qty = int(pid), int(qty)
+        except (TypeError, ValueError):
+            continue
+        if qty > 0:
+            quantities[pid] = quantities.get(pid, 0) + qty
+    return quantities
+
+
+def resolve_cart(cart):
+    """
+    Load every product in the cart with one IN (...) query
+
+    Args:
+        cart (dict): session cart mapping product id (str) -> quantity
+
+    Returns:
+        tuple: (ResolvedCart, cleaned cart dict with stale ids removed)
+    """
+    quantities = _normalise(cart)
+    products = {}
+    if quantities:
+        rows = Product.query.filter(Product.id.in_(list(quantities))).all()
+        products = {product.id: product for product in rows}
+
+    items = []
+    total = 0
+    count = 0
+    cleaned = {}
+    for pid, qty in quantities.items():
+        product = products.get(pid)
+        if product is None:
+            continue
+        line_total = product.price * qty
+        items.append({'product': product, 'quantity': qty, 'line_total': line_total})
+        total += line_total
+        count += qty
+        cleaned[str(pid)] = qty
+    return ResolvedCart(items, total, count), cleaned
+
+
+def resolve_session_cart(session):
+    """
+    Resolve session['cart'] and drop deleted or malformed product ids from it
+
+    Args:
+        session: the Flask session
+
+    Returns:
+        ResolvedCart: line items, grand total and total item count
+    """
+    cart = current_cart(session)
+    resolved, cleaned = resolve_cart(cart)
+    if cleaned != cart:
+        _store(session, cleaned)
+    elif cleaned != session.get('cart', {}):
+        session['cart'] = cleaned  # changed on another device
+    return resolved
+
+
+def current_cart(session):
+    """The session cart, or the phone's saved cart if another device may have changed it"""
+    phone = session.get('cart_phone')
+    if phone:
+        saved = db.session.get(SavedCart, phone)
+        if saved is not None:
+            return json.loads(saved.cart)
+    return session.get('cart', {})
+
+
+def _store(session, cart):
+    """Write the cart back to the session and, once linked, to the phone's saved cart"""
+    session['cart'] = cart
+    phone = session.get('cart_phone')
+    if phone:
+        db.session.merge(SavedCart(phone=phone, cart=json.dumps(cart), updated_at=datetime.utcnow()))
+        db.session.commit()
+
+
+def add_item(session, product_id, quantity=1):
+    """Add quantity of a product to the session cart"""
+    cart = current_cart(session)
+    cart[str(product_id)] = cart.get(str(product_id), 0) + quantity
+    _store(session, cart)
+
+
+def remove_item(session, product_id):
+    """Remove a product line from the session cart"""
+    cart = current_cart(session)
+    cart.pop(str(product_id), None)
+    _store(session, cart)
+
+
+def normalise_phone(phone):
+    """Digits-only phone with country code, or None if it is not plausibly a phone number"""
+    digits = format_phone_number(phone or '')
+    return digits if digits.isdigit() and 10 <= len(digits) <= 15 else None
+
+
+def _code_hash(secret, phone, code):
+    return hmac.new(secret.encode(), f'{phone}:{code}'.encode(), hashlib.sha256).hexdigest()
+
+
+def request_link_code(phone, secret):
+    """
+    Queue a one-time code to the phone on WhatsApp
+
+    The code row and its outbox message are written in one transaction;
+    a new code replaces any earlier one for the phone.
+
+    Args:
+        phone (str): normalised phone from normalise_phone()
+        secret (str): app SECRET_KEY, keys the stored code hash
+
+    Returns:
+        bool: False if a code was sent to this phone less than CODE_RESEND_SECONDS ago
+    """
+    now = datetime.utcnow()
+    code = f'{secrets.randbelow(10 ** 6):06d}'
+    with write_transaction(db.engine) as conn:
+        sent_at = conn.execute(select(link_codes.c.sent_at).where(link_codes.c.phone == phone)).scalar()
+        if sent_at is not None and (now - sent_at).total_seconds() < CODE_RESEND_SECONDS:
+            return False
+        conn.execute(delete(link_codes).where(link_codes.c.phone == phone))
+        conn.execute(link_codes.insert().values(phone=phone, code_hash=_code_hash(secret, phone, code),
+                                                attempts=0, sent_at=now, expires_at=now + CODE_TTL))
+        enqueue_cart_link_code(conn, phone, code)
+    return True
+
+
+def verify_link_code(phone, code, secret):
+    """
+    Check a code from request_link_code(); each code allows CODE_MAX_ATTEMPTS guesses
+
+    Returns:
+        bool: True once, for the right unexpired code (the code is then used up)
+    """
+    code = (code or '').strip()
+    with write_transaction(db.engine) as conn:
+        row = conn.execute(select(link_codes.c.code_hash, link_codes.c.attempts, link_codes.c.expires_at)
+                           .where(link_codes.c.phone == phone)).first()
+        if row is None:
+            return False
+        if row.expires_at <= datetime.utcnow() or row.attempts >= CODE_MAX_ATTEMPTS:
+            conn.execute(delete(link_codes).where(link_codes.c.phone == phone))
+            return False
+        if hmac.compare_digest(row.code_hash, _code_hash(secret, phone, code)):
+            conn.execute(delete(link_codes).where(link_codes.c.phone == phone))
+            return True
+        conn.execute(link_codes.update().where(link_codes.c.phone == phone)
+                     .values(attempts=link_codes.c.attempts + 1))
+        return False
+
+
+def link_cart_to_phone(session, phone):
+    """
+    Share this visitor's cart with every device that links the same phone
+
+    Only call this after verify_link_code() has proved the visitor owns
+    the phone.
+
+    The saved cart and the session cart are merged (largest quantity per
+    product wins, so linking twice never doubles anything) and stored back.
+
+    Args:
+        session: the Flask session
+        phone (str): normalised phone from normalise_phone()
+
+    Returns:
+        int: number of items in the merged cart
+    """
+    saved = db.session.get(SavedCart, phone)
+    merged = _normalise(json.loads(saved.cart)) if saved else {}
+    for pid, qty in _normalise(session.get('cart', {})).items():
+        merged[pid] = max(merged.get(pid, 0), qty)
+    session['cart_phone'] = phone
+    _store(session, {str(pid): qty for pid, qty in merged.items()})
+    return sum(merged.values())
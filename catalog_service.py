@@ -0,0 +1,221 @@
+"""
+Catalog Service Module
+Paged, filterable product queries shared by the storefront and admin grids.
+
+Uses keyset (cursor) pagination: each page seeks past the last row of the
+previous page via the composite indexes on Product, so page N costs about
+the same as page 1 no matter how large the catalog grows.
+
+bulk_update_products() applies one admin action to many products with a
+single set-based UPDATE or DELETE.
+"""
+
+import base64
+import json
+import math
+from collections import namedtuple
+
+from sqlalchemy import delete, func, tuple_, update
+
+from models import db, Product, write_transaction
+
+AVAILABILITY_CHOICES = ('available', 'out_of_stock', 'made_to_order')
+
+# sort key -> (column, descending)
+SORT_OPTIONS = {
+    'newest': (Product.id, True),
+    'price_asc': (Product.price, False),
+    'price_desc': (Product.price, True),
+    'name': (Product.name, False),
+}
+DEFAULT_SORT = 'newest'
+
+FILTER_KEYS = ('availability', 'color', 'size', 'min_price', 'max_price', 'sort')
+
+Page = namedtuple('Page', ['items', 'next_cursor'])
+
+BULK_ACTIONS = ('set_availability', 'adjust_price', 'delete')
+
+# count: products changed; images: (image, image_variants) of deleted products
+BulkResult = namedtuple('BulkResult', ['count', 'images'])
+
+
+def encode_cursor(values):
+    """Encode the sort key of the last row on a page as an opaque URL-safe token"""
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor token, returning None if it is missing or malformed"""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) not in (1, 2):
+        return None
+    return values
+
+
+def _parse_price(value):
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        return None
+    return price if price >= 0 else None
+
+
+def parse_catalog_args(args):
+    """
+    Normalise catalog query-string arguments into a filters dict
+
+    Args:
+        args: request.args (or any mapping)
+
+    Returns:
+        dict: only the filters that were supplied and valid, so it can be
+              passed straight back into url_for() to build page links
+    """
+    filters = {}
+    availability = args.get('availability', '').strip()
+    if availability in AVAILABILITY_CHOICES:
+        filters['availability'] = availability
+    for key in ('color', 'size'):
+        value = args.get(key, '').strip()
+        if value:
+            filters[key] = value
+    for key in ('min_price', 'max_price'):
+        price = _parse_price(args.get(key))
+        if price is not None:
+            filters[key] = price
+    sort = args.get('sort', '').strip()
+    if sort in SORT_OPTIONS and sort != DEFAULT_SORT:
+        filters['sort'] = sort
+    return filters
+
+
+def filtered_query(filters, query=None):
+    """Apply catalog filters (but no ordering) to a Product query"""
+    if query is None:
+        query = Product.query
+    if 'availability' in filters:
+        query = query.filter(Product.availability == filters['availability'])
+    if 'color' in filters:
+        query = query.filter(Product.color == filters['color'])
+    if 'size' in filters:
+        query = query.filter(Product.size == filters['size'])
+    if 'min_price' in filters:
+        query = query.filter(Product.price >= filters['min_price'])
+    if 'max_price' in filters:
+        query = query.filter(Product.price <= filters['max_price'])
+    return query
+
+
+def paginate_products(filters=None, cursor=None, per_page=24, query=None):
+    """
+    Fetch one page of products using keyset pagination
+
+    Args:
+        filters (dict): output of parse_catalog_args()
+        cursor (str): next_cursor from the previous page, or None for page 1
+        per_page (int): number of products per page
+        query: optional base query (e.g. Product.query.options(...))
+
+    Returns:
+        Page: items for this page and the cursor for the next page (or None)
+    """
+    filters = filters or {}
+    column, descending = SORT_OPTIONS[filters.get('sort', DEFAULT_SORT)]
+    query = filtered_query(filters, query)
+
+    after = decode_cursor(cursor)
+    if column is Product.id:
+        if after:
+            query = query.filter(Product.id < after[-1] if descending else Product.id > after[-1])
+        query = query.order_by(Product.id.desc() if descending else Product.id.asc())
+    else:
+        if after and len(after) == 2:
+            key = tuple_(column, Product.id)
+            query = query.filter(key < tuple(after) if descending else key > tuple(after))
+        if descending:
+            query = query.order_by(column.desc(), Product.id.desc())
+        else:
+            query = query.order_by(column.asc(), Product.id.asc())
+
+    rows = query.limit(per_page + 1).all()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        if column is Product.id:
+            next_cursor = encode_cursor([last.id])
+        else:
+            next_cursor = encode_cursor([getattr(last, column.key), last.id])
+    return Page(rows, next_cursor)
+
+
+def count_products(filters=None):
+    """Count products matching the filters with a single SQL COUNT"""
+    return filtered_query(filters or {}).order_by(None).count()
+
+
+def distinct_values(column):
+    """Distinct non-empty values of a Product column, for filter dropdowns"""
+    rows = db.session.query(column).filter(column.isnot(None), column != '') \
+        .distinct().order_by(column).all()
+    return [row[0] for row in rows]
+
+
+def bulk_update_products(action, ids=None, filters=None, value=None):
+    """
+    Apply one admin action to many products in a single write transaction
+
+    Products are chosen by id, or by catalog filters when ids is None, and
+    changed with one UPDATE or DELETE. Image files are not touched; pass
+    the returned images to upload_service.release_images_later().
+
+    Args:
+        action (str): one of BULK_ACTIONS
+        ids (list): product ids, or None to use filters
+        filters (dict): output of parse_catalog_args() (used when ids is None)
+        value: availability for set_availability, percentage for adjust_price
+
+    Returns:
+        BulkResult: number of products changed and the deleted products' images
+
+    Raises:
+        ValueError: unknown action, no products selected or an invalid value
+    """
+    if action not in BULK_ACTIONS:
+        raise ValueError(f'Unknown bulk action: {action}')
+    if ids is not None:
+        if not ids:
+            raise ValueError('No products selected')
+        selected = Product.id.in_(ids)
+    else:
+        selected = Product.id.in_(filtered_query(filters or {}, db.session.query(Product.id)).statement)
+
+    if action == 'set_availability':
+        if value not in AVAILABILITY_CHOICES:
+            raise ValueError(f'Unknown availability: {value}')
+        statement = update(Product).where(selected, Product.availability != value).values(availability=value)
+    elif action == 'adjust_price':
+        try:
+            percent = float(value)
+        except (TypeError, ValueError):
+            raise ValueError('Price change must be a number') from None
+        if not math.isfinite(percent) or percent <= -100 or percent == 0:
+            raise ValueError('Price change must be a non-zero percentage above -100')
+        statement = update(Product).where(selected).values(price=func.round(Product.price * (1 + percent / 100), 2))
+    else:
+        statement = delete(Product).where(selected).returning(Product.image, Product.image_variants)
+
+    with write_transaction(db.engine) as conn:
+        result = conn.execute(statement)
+        if action == 'delete':
+            rows = result.all()
+            return BulkResult(len(rows), [(image, variants) for image, variants in rows if image])
+        return BulkResult(result.rowcount, [])
@@ -10,20 +10,96 @@ SECRET_KEY = os.getenv('SECRET_KEY', 'change-this-in-production')
 DEBUG = os.getenv('DEBUG', 'False') == 'True'
 
 # Database
-SQLALCHEMY_DATABASE_URI = 'sqlite:///baskets.db'
+SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///baskets.db')
 SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+# SQLite engine profile for multi-worker gunicorn (applied per connection in models.init_db)
+SQLITE_PRAGMAS = {
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'WAL'),  # readers no longer block the writer
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL'),  # safe with WAL, far fewer fsyncs
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000')),  # wait for the lock instead of erroring
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', str(128 * 1024 * 1024))),
+    'temp_store': 'MEMORY',
+}
+SQLALCHEMY_ENGINE_OPTIONS = {
+    'pool_size': int(os.getenv('SQLITE_POOL_SIZE', '5')),
+    'max_overflow': int(os.getenv('SQLITE_MAX_OVERFLOW', '5')),
+    'pool_timeout': 10,
+}
+
+# Catalog Pagination
+PRODUCTS_PER_PAGE = int(os.getenv('PRODUCTS_PER_PAGE', '24'))
+ADMIN_PRODUCTS_PER_PAGE = int(os.getenv('ADMIN_PRODUCTS_PER_PAGE', '50'))
+ADMIN_ORDERS_PER_PAGE = int(os.getenv('ADMIN_ORDERS_PER_PAGE', '25'))
+DASHBOARD_STATS_DAYS = int(os.getenv('DASHBOARD_STATS_DAYS', '30'))  # Days shown in orders-per-day
+
+# JSON API (/api/products, /api/cart)
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', '100'))  # Largest ?limit= accepted
+API_GZIP_MIN_BYTES = int(os.getenv('API_GZIP_MIN_BYTES', '1024'))  # Smaller bodies are sent uncompressed
+
+# Custom order retention (see retention_service.py)
+ORDER_ARCHIVE_DAYS = int(os.getenv('ORDER_ARCHIVE_DAYS', '365'))  # Older orders move to the archive table; 0 = keep all
+ORDER_ARCHIVE_BATCH = int(os.getenv('ORDER_ARCHIVE_BATCH', '500'))  # Orders moved per write transaction
+ORDER_ARCHIVE_INTERVAL_SECONDS = int(os.getenv('ORDER_ARCHIVE_INTERVAL_SECONDS', '3600'))
+ORDER_ARCHIVE_WORKER = os.getenv('ORDER_ARCHIVE_WORKER', 'thread')  # thread (in each web worker) or off (cron the CLI)
+
+# Search
+SEARCH_RESULTS_LIMIT = int(os.getenv('SEARCH_RESULTS_LIMIT', '48'))
+SEARCH_RANK_CANDIDATES = int(os.getenv('SEARCH_RANK_CANDIDATES', '500'))  # newest matches scored by bm25
+
+# Rendered page cache for home/products/product detail (per worker, LRU)
+PAGE_CACHE_ENABLED = os.getenv('PAGE_CACHE_ENABLED', 'True') == 'True'
+PAGE_CACHE_SIZE = int(os.getenv('PAGE_CACHE_SIZE', '256'))
+# Part of every page/API ETag so a deploy invalidates browser copies; when unset, the newest
+# template/code mtime and the build-assets manifest are used instead (see asset_service.build_stamp)
+RELEASE_ID = os.getenv('RELEASE_ID', '')
+
+# Sessions: 'cookie' keeps the whole session in Flask's signed cookie; 'server' stores it in
+# the web_session table and the cookie only carries an opaque id (see session_service.py)
+SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'cookie')
+SESSION_CACHE_SIZE = int(os.getenv('SESSION_CACHE_SIZE', '1024'))  # Sessions kept in memory per worker
+SESSION_GC_SECONDS = int(os.getenv('SESSION_GC_SECONDS', '600'))  # How often expired sessions are purged
+
+# Admin login throttling: token buckets per client IP and per username, shared by all workers
+LOGIN_THROTTLE_ENABLED = os.getenv('LOGIN_THROTTLE_ENABLED', 'True') == 'True'
+THROTTLE_DB = os.getenv('THROTTLE_DB', '')  # Defaults to instance/throttle.db
+LOGIN_IP_BURST = int(os.getenv('LOGIN_IP_BURST', '10'))  # Attempts allowed back-to-back from one IP
+LOGIN_IP_PER_MINUTE = float(os.getenv('LOGIN_IP_PER_MINUTE', '5'))  # Then this many per minute
+LOGIN_USER_BURST = int(os.getenv('LOGIN_USER_BURST', '5'))
+LOGIN_USER_PER_MINUTE = float(os.getenv('LOGIN_USER_PER_MINUTE', '2'))
+PROXY_FIX_X_FOR = int(os.getenv('PROXY_FIX_X_FOR', '0'))  # Proxies in front of the app (1 on Render/Heroku)
+
 # Upload Settings
 UPLOAD_FOLDER = 'uploads'
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max upload
+IMAGE_VARIANT_WIDTHS = (320, 640, 960)  # Resized copies generated per upload (plus WebP)
 
 # WhatsApp
 WHATSAPP_NUMBER = os.getenv('WHATSAPP_NUMBER', '9863824320')  # Replace with actual number
+SETTINGS_CACHE_TTL = int(os.getenv('SETTINGS_CACHE_TTL', '30'))  # Seconds before a worker re-checks settings
 
 # Twilio Configuration for WhatsApp
 TWILIO_ACCOUNT_SID = os.getenv('TWILIO_ACCOUNT_SID', '')  # Get from https://console.twilio.com
 TWILIO_AUTH_TOKEN = os.getenv('TWILIO_AUTH_TOKEN', '')  # Get from https://console.twilio.com
 TWILIO_WHATSAPP_NUMBER = os.getenv('TWILIO_WHATSAPP_NUMBER', 'whatsapp:+14155238886')  # Twilio WhatsApp sandbox number
+TWILIO_API_BASE = os.getenv('TWILIO_API_BASE', 'https://api.twilio.com')  # Point at a local stub server for testing
+
+# Notification outbox (custom order messages sent in the background)
+NOTIFICATION_TRANSPORT = os.getenv('NOTIFICATION_TRANSPORT', 'twilio')  # twilio, log, or off
+NOTIFICATION_WORKER = os.getenv('NOTIFICATION_WORKER', 'thread')  # thread (in each web worker) or off (run the CLI worker)
+NOTIFICATION_BATCH_SIZE = int(os.getenv('NOTIFICATION_BATCH_SIZE', '20'))
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv('NOTIFICATION_MAX_ATTEMPTS', '6'))
+NOTIFICATION_BACKOFF_SECONDS = int(os.getenv('NOTIFICATION_BACKOFF_SECONDS', '30'))  # Doubles per retry
+NOTIFICATION_MAX_BACKOFF_SECONDS = int(os.getenv('NOTIFICATION_MAX_BACKOFF_SECONDS', '3600'))
+NOTIFICATION_LEASE_SECONDS = int(os.getenv('NOTIFICATION_LEASE_SECONDS', '120'))  # Reclaim if a sender dies mid-batch
+NOTIFICATION_POLL_SECONDS = int(os.getenv('NOTIFICATION_POLL_SECONDS', '15'))
+
+# Instrumentation (off by default; adds Server-Timing headers and /admin/metrics when on)
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'False') == 'True'
+METRICS_DB = os.getenv('METRICS_DB', '')  # Shared by all workers; defaults to instance/metrics.db
+METRICS_FLUSH_SECONDS = int(os.getenv('METRICS_FLUSH_SECONDS', '5'))
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')  # Bearer token for Prometheus scrapes
+SLOW_QUERY_MS = int(os.getenv('SLOW_QUERY_MS', '100'))  # Log statements slower than this
 
 # Admin Settings
 ADMIN_USERNAME = os.getenv('ADMIN_USERNAME', 'admin')
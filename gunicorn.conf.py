@@ -0,0 +1,19 @@
+"""
+Gunicorn settings, read automatically when gunicorn starts in this directory
+
+The app is imported once in the master and workers are forked from it, so
+a new or restarted worker is ready without importing Flask, SQLAlchemy and
+the services again. Importing app.py does no database I/O (run
+`flask --app app bootstrap` once per deploy instead). Start it with
+`gunicorn 'app:create_app()'`.
+"""
+
+preload_app = True
+
+
+def post_fork(server, worker):
+    # The master never queries, but make sure no pooled SQLite connection is shared across processes
+    from models import db
+    app = server.app.wsgi()  # the app preloaded in the master
+    with app.app_context():
+        db.engine.dispose(close=False)
@@ -0,0 +1,107 @@
+"""
+Image Service Module
+Builds resized and WebP variants of product photos at upload time.
+
+Variants are written next to the original in UPLOAD_FOLDER as
+<stem>_<width>w.<ext> and recorded on Product.image_variants so templates
+can emit srcset/sizes and phones download a tile-sized image instead of
+the full upload.
+"""
+
+import json
+import os
+
+DEFAULT_WIDTHS = (320, 640, 960)
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+
+def _pillow():
+    """Import Pillow on first use so web workers don't load it at startup"""
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:  # Pillow not installed: uploads are served as-is
+        return None, None
+    return Image, ImageOps
+
+
+def _fallback_format(image):
+    """Keep PNG for images with transparency, use JPEG for everything else"""
+    if image.format == 'PNG' and ('A' in image.getbands() or 'transparency' in image.info):
+        return 'PNG', 'png'
+    return 'JPEG', 'jpg'
+
+
+def _save(image, path, fmt):
+    if fmt == 'JPEG':
+        image.convert('RGB').save(path, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+    elif fmt == 'WEBP':
+        image.save(path, 'WEBP', quality=WEBP_QUALITY, method=4)
+    else:
+        image.save(path, fmt, optimize=True)
+
+
+def generate_variants(upload_folder, filename, widths=DEFAULT_WIDTHS):
+    """
+    Create resized fallback and WebP variants for an uploaded image
+
+    Args:
+        upload_folder (str): Directory holding the original upload
+        filename (str): Name of the original file in upload_folder
+        widths (iterable): Target widths in pixels; never upscaled
+
+    Returns:
+        str: JSON for Product.image_variants, or None if the image
+             could not be processed
+    """
+    Image, ImageOps = _pillow()
+    if Image is None or not filename:
+        return None
+    stem = os.path.splitext(filename)[0]
+    try:
+        with Image.open(os.path.join(upload_folder, filename)) as original:
+            fmt, ext = _fallback_format(original)
+            image = ImageOps.exif_transpose(original)
+            if image.mode not in ('RGB', 'RGBA'):
+                image = image.convert('RGBA' if fmt == 'PNG' else 'RGB')
+
+            targets = sorted({w for w in widths if w < image.width} | {min(image.width, max(widths))})
+            variants = {'fallback': {}, 'webp': {}}
+            for width in targets:
+                height = max(1, round(image.height * width / image.width))
+                resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+                for kind, save_fmt, save_ext in (('fallback', fmt, ext), ('webp', 'WEBP', 'webp')):
+                    name = f'{stem}_{width}w.{save_ext}'
+                    path = os.path.join(upload_folder, name)
+                    # Content-addressed originals share variants; don't redo them
+                    if not os.path.exists(path):
+                        _save(resized, path, save_fmt)
+                    variants[kind][str(width)] = name
+    except (OSError, ValueError):
+        return None
+    return json.dumps(variants)
+
+
+def variant_files(image_variants):
+    """List every file name recorded in a Product.image_variants value"""
+    variants = load_variants(image_variants)
+    return [name for kind in variants.values() for name in kind.values()]
+
+
+def load_variants(image_variants):
+    """Parse Product.image_variants into {'fallback': {...}, 'webp': {...}}"""
+    if not image_variants:
+        return {}
+    try:
+        return json.loads(image_variants)
+    except ValueError:
+        return {}
+
+
+def remove_variants(upload_folder, image_variants):
+    """Delete variant files from disk, ignoring ones already gone"""
+    for name in variant_files(image_variants):
+        try:
+            os.remove(os.path.join(upload_folder, name))
+        except FileNotFoundError:
+            pass
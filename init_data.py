@@ -1,12 +1,32 @@
 """
 Sample Data Initialization Script
-Populates the database with example products for testing.
+Populates the database with example products for testing, and bulk
+imports/exports whole catalogs as CSV or JSONL.
 
-Usage: python init_data.py
+Usage:
+    python init_data.py                          # add the sample products
+    python init_data.py import catalog.csv       # upsert products by name
+    python init_data.py export catalog.jsonl     # stream every product out
+    (use - for stdin/stdout, --format csv|jsonl when there is no extension)
 """
 
-from app import app, db
+import argparse
+import csv
+import json
+import sys
+import time
+
+from sqlalchemy import bindparam, case, func, select, update
+
+from app import create_app, bootstrap, db
 from models import Product
+from settings_service import bump_catalog_version
+
+app = create_app()
+
+CATALOG_FIELDS = ('name', 'description', 'price', 'availability', 'size', 'color', 'image')
+AVAILABILITY = ('available', 'out_of_stock', 'made_to_order')
+BATCH_SIZE = 2000
 
 def init_sample_data():
     """Add sample products to database"""
@@ -66,16 +86,201 @@ def init_sample_data():
             ),
         ]
         
-        # Add to database
-        for product in products:
-            # Check if product already exists
-            if not Product.query.filter_by(name=product.name).first():
-                db.session.add(product)
-                print(f"✓ Added: {product.name}")
-        
+        # Add the ones that don't exist yet (one existence query for the whole list)
+        rows = [{field: getattr(product, field) for field in CATALOG_FIELDS} for product in products]
+        added, _ = upsert_products(rows, update_existing=False)
+        for row in added:
+            print(f"✓ Added: {row['name']}")
         db.session.commit()
+        if added:
+            bump_catalog_version()
         print("\n✅ Sample data initialized successfully!")
         print(f"📦 Total products in database: {Product.query.count()}")
 
+def _update_statement():
+    """executemany UPDATE by id that keeps the current image when a row has none"""
+    products = Product.__table__
+    new_image = bindparam('new_image')
+    values = {field: bindparam(f'new_{field}') for field in CATALOG_FIELDS if field != 'image'}
+    # SET expressions all see the old row, so the variants are cleared only when the image really changes
+    values['image_variants'] = case(
+        (new_image.is_(None), products.c.image_variants),
+        (products.c.image.is_(None), None),
+        (products.c.image != new_image, None),
+        else_=products.c.image_variants)
+    values['image'] = func.coalesce(new_image, products.c.image)
+    return update(products).where(products.c.id == bindparam('pid')).values(values)
+
+
+def upsert_products(rows, update_existing=True):
+    """
+    Insert or update one batch of products, matching on name
+
+    Existing names are found with a single IN (...) query, new rows go in
+    with one executemany INSERT and updates with one executemany UPDATE.
+    An update without an image keeps the product's current one; a
+    different image clears image_variants so the old srcset is not served
+    (run `flask --app app backfill-images` afterwards). The caller commits.
+
+    Args:
+        rows (list): dicts keyed by CATALOG_FIELDS (already validated)
+        update_existing (bool): update products whose name already exists
+
+    Returns:
+        tuple: (inserted rows, updated rows)
+    """
+    by_name = {row['name']: row for row in rows}  # last row wins within a batch
+    existing = {}
+    for pid, name in db.session.execute(select(Product.id, Product.name).where(Product.name.in_(list(by_name)))):
+        existing.setdefault(name, []).append(pid)
+
+    new_rows = [row for name, row in by_name.items() if name not in existing]
+    if new_rows:
+        db.session.execute(Product.__table__.insert(), new_rows)
+    updates = []
+    if update_existing:
+        updates = [dict(row, id=pid) for name, row in by_name.items() for pid in existing.get(name, ())]
+        if updates:
+            db.session.execute(_update_statement(),
+                               [dict({f'new_{field}': row[field] for field in CATALOG_FIELDS}, pid=row['id'])
+                                for row in updates])
+    return new_rows, updates
+
+
+def _clean(raw):
+    """Validate one catalog record; returns a row dict or None to skip it"""
+    name = (raw.get('name') or '').strip()
+    if not name:
+        return None
+    try:
+        price = float(raw.get('price'))
+    except (TypeError, ValueError):
+        return None
+    availability = (raw.get('availability') or 'available').strip()
+    return {
+        'name': name[:100],
+        'description': raw.get('description') or '',
+        'price': price,
+        'availability': availability if availability in AVAILABILITY else 'available',
+        'size': raw.get('size') or None,
+        'color': raw.get('color') or None,
+        'image': raw.get('image') or None,
+    }
+
+
+def _detect_format(path, fmt):
+    if fmt:
+        return fmt
+    if path.endswith('.csv'):
+        return 'csv'
+    if path.endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    sys.exit('✗ Cannot tell the format from the file name; pass --format csv or --format jsonl')
+
+
+def _read_records(handle, fmt):
+    if fmt == 'csv':
+        yield from csv.DictReader(handle)
+    else:
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _progress(label, count, started):
+    rate = count / max(time.perf_counter() - started, 1e-9)
+    print(f"  {label} {count:,} rows ({rate:,.0f} rows/s)", file=sys.stderr)
+
+
+def import_catalog(path, fmt=None, batch_size=BATCH_SIZE):
+    """Stream a CSV/JSONL catalog into the database, committing per batch"""
+    fmt = _detect_format(path, fmt)
+    handle = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+    started = time.perf_counter()
+    totals = {'read': 0, 'inserted': 0, 'updated': 0, 'skipped': 0}
+    with app.app_context():
+        batch = []
+
+        def flush():
+            inserted, updated = upsert_products(batch)
+            db.session.commit()
+            totals['inserted'] += len(inserted)
+            totals['updated'] += len(updated)
+            batch.clear()
+            _progress('imported', totals['read'], started)
+
+        try:
+            for raw in _read_records(handle, fmt):
+                totals['read'] += 1
+                row = _clean(raw)
+                if row is None:
+                    totals['skipped'] += 1
+                    continue
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    flush()
+            if batch:
+                flush()
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+        if totals['inserted'] or totals['updated']:
+            bump_catalog_version()
+    elapsed = time.perf_counter() - started
+    print(f"✅ Imported {totals['read']:,} rows in {elapsed:.1f}s: {totals['inserted']:,} added, "
+          f"{totals['updated']:,} updated, {totals['skipped']:,} skipped", file=sys.stderr)
+    return totals
+
+
+def export_catalog(path, fmt=None, batch_size=BATCH_SIZE):
+    """Stream every product to CSV/JSONL without loading the table into memory"""
+    fmt = _detect_format(path, fmt)
+    handle = sys.stdout if path == '-' else open(path, 'w', newline='', encoding='utf-8')
+    started = time.perf_counter()
+    count = 0
+    with app.app_context():
+        columns = [getattr(Product, field) for field in CATALOG_FIELDS]
+        result = db.session.execute(select(*columns).order_by(Product.id).execution_options(yield_per=batch_size))
+        writer = None
+        if fmt == 'csv':
+            writer = csv.writer(handle)
+            writer.writerow(CATALOG_FIELDS)
+        try:
+            for partition in result.partitions():
+                for row in partition:
+                    if writer:
+                        writer.writerow(row)
+                    else:
+                        handle.write(json.dumps(dict(zip(CATALOG_FIELDS, row)), ensure_ascii=False) + '\n')
+                count += len(partition)
+                _progress('exported', count, started)
+        finally:
+            if handle is not sys.stdout:
+                handle.close()
+    print(f"✅ Exported {count:,} products in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Seed, import or export the product catalog')
+    sub = parser.add_subparsers(dest='command')
+    for name in ('import', 'export'):
+        cmd = sub.add_parser(name, help=f'{name} a CSV or JSONL catalog')
+        cmd.add_argument('path', help='file path, or - for stdin/stdout')
+        cmd.add_argument('--format', choices=('csv', 'jsonl'))
+        cmd.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    if args.command != 'export':
+        with app.app_context():
+            bootstrap()  # cheap no-op once `flask --app app bootstrap` has run
+
+    if args.command == 'import':
+        import_catalog(args.path, args.format, args.batch_size)
+    elif args.command == 'export':
+        export_catalog(args.path, args.format, args.batch_size)
+    else:
+        init_sample_data()
+
 if __name__ == "__main__":
-    init_sample_data()
+    main()
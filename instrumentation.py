@@ -0,0 +1,212 @@
+"""
+Instrumentation Module
+Opt-in per-request timing, SQL counters, slow-query log and Prometheus metrics.
+
+Enabled with METRICS_ENABLED=True; when disabled nothing is registered, so
+requests pay no overhead. Each gunicorn worker buffers counters in memory
+and periodically adds them into a small SQLite file (METRICS_DB) shared by
+all workers, which /admin/metrics renders in Prometheus text format. The
+store uses the sqlite3 module directly so its own writes are not counted
+as application SQL.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from contextlib import closing
+
+from flask import abort, current_app, g, has_request_context, request, session
+from flask import before_render_template, template_rendered
+
+from sqlalchemy import event
+
+from models import db
+
+logger = logging.getLogger('nakhasbit.sql')
+
+# Request duration histogram buckets (seconds)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+PREFIX = 'nakhasbit'
+
+SCHEMA = """CREATE TABLE IF NOT EXISTS metrics (
+    name TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    le TEXT NOT NULL DEFAULT '',
+    value REAL NOT NULL,
+    PRIMARY KEY (name, endpoint, le)
+)"""
+
+
+class MetricsStore:
+    """Per-worker counter buffer that flushes into the shared SQLite file"""
+
+    def __init__(self, path, flush_seconds):
+        self.path = path
+        self.flush_seconds = flush_seconds
+        self._pending = defaultdict(float)
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._ready = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        if not self._ready:  # first use, not import time, so workers start without touching the file
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(SCHEMA)
+            self._ready = True
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def add(self, name, endpoint, value, le=''):
+        self._pending[(name, endpoint, le)] += value
+
+    def observe_request(self, endpoint, duration, sql_count, sql_time, render_time):
+        with self._lock:
+            for bound in BUCKETS:  # cumulative buckets; zeros keep every bucket present
+                self.add('request_duration_seconds_bucket', endpoint, int(duration <= bound), repr(bound))
+            self.add('request_duration_seconds_bucket', endpoint, 1, '+Inf')
+            self.add('request_duration_seconds_sum', endpoint, duration)
+            self.add('request_duration_seconds_count', endpoint, 1)
+            self.add('sql_queries_total', endpoint, sql_count)
+            self.add('sql_duration_seconds_total', endpoint, sql_time)
+            self.add('render_duration_seconds_total', endpoint, render_time)
+        if time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def observe_slow_query(self, endpoint):
+        with self._lock:
+            self.add('slow_queries_total', endpoint, 1)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(float)
+            self._last_flush = time.monotonic()
+        if not pending:
+            return
+        try:
+            with closing(self._connect()) as conn:
+                conn.execute('BEGIN IMMEDIATE')
+                conn.executemany(
+                    'INSERT INTO metrics (name, endpoint, le, value) VALUES (?, ?, ?, ?) '
+                    'ON CONFLICT (name, endpoint, le) DO UPDATE SET value = value + excluded.value',
+                    [(name, endpoint, le, value) for (name, endpoint, le), value in pending.items()])
+                conn.execute('COMMIT')
+        except sqlite3.Error:
+            logger.exception('Could not flush metrics')
+
+    def read(self):
+        with closing(self._connect()) as conn:
+            return conn.execute('SELECT name, endpoint, le, value FROM metrics ORDER BY name, endpoint').fetchall()
+
+
+def _bucket_order(le):
+    return float('inf') if le == '+Inf' else float(le)
+
+
+def render_prometheus(rows):
+    """Format stored counters as Prometheus text exposition"""
+    help_text = {
+        'request_duration_seconds': ('histogram', 'Request duration by endpoint'),
+        'sql_queries_total': ('counter', 'SQL statements executed by endpoint'),
+        'sql_duration_seconds_total': ('counter', 'Time spent in SQL by endpoint'),
+        'render_duration_seconds_total': ('counter', 'Time spent rendering Jinja templates by endpoint'),
+        'slow_queries_total': ('counter', 'SQL statements slower than SLOW_QUERY_MS by endpoint'),
+    }
+    grouped = defaultdict(list)
+    for name, endpoint, le, value in rows:
+        family = name.rsplit('_', 1)[0] if name.startswith('request_duration_seconds') else name
+        grouped[family].append((name, endpoint, le, value))
+
+    lines = []
+    for family, (kind, description) in help_text.items():
+        samples = grouped.get(family)
+        if not samples:
+            continue
+        lines.append(f'# HELP {PREFIX}_{family} {description}')
+        lines.append(f'# TYPE {PREFIX}_{family} {kind}')
+        samples.sort(key=lambda s: (s[1], s[0], _bucket_order(s[2]) if s[2] else 0))
+        for name, endpoint, le, value in samples:
+            labels = f'endpoint="{endpoint}"' + (f',le="{le}"' if le else '')
+            lines.append(f'{PREFIX}_{name}{{{labels}}} {value:g}')
+    return '\n'.join(lines) + '\n'
+
+
+def _endpoint():
+    return request.endpoint or 'unmatched'
+
+
+def init_instrumentation(app):
+    """Register request, template and SQL hooks when METRICS_ENABLED is set"""
+    if not app.config.get('METRICS_ENABLED'):
+        return
+    path = app.config.get('METRICS_DB') or os.path.join(app.instance_path, 'metrics.db')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    store = MetricsStore(path, app.config.get('METRICS_FLUSH_SECONDS', 5))
+    app.extensions['metrics_store'] = store
+    slow_seconds = app.config.get('SLOW_QUERY_MS', 100) / 1000.0
+
+    @app.before_request
+    def start_timer():
+        g.metrics = {'start': time.perf_counter(), 'sql_count': 0, 'sql_time': 0.0,
+                     'render_time': 0.0, 'render_started': []}
+
+    @app.after_request
+    def record_request(response):
+        metrics = g.pop('metrics', None)
+        if metrics is None:
+            return response
+        duration = time.perf_counter() - metrics['start']
+        response.headers['Server-Timing'] = (
+            f'app;dur={duration * 1000:.1f}, '
+            f'db;dur={metrics["sql_time"] * 1000:.1f};desc="{metrics["sql_count"]} queries", '
+            f'render;dur={metrics["render_time"] * 1000:.1f}')
+        store.observe_request(_endpoint(), duration, metrics['sql_count'],
+                              metrics['sql_time'], metrics['render_time'])
+        return response
+
+    def render_started(sender, template, context, **extra):
+        if 'metrics' in g:
+            g.metrics['render_started'].append(time.perf_counter())
+
+    def render_finished(sender, template, context, **extra):
+        if 'metrics' in g and g.metrics['render_started']:
+            g.metrics['render_time'] += time.perf_counter() - g.metrics['render_started'].pop()
+
+    before_render_template.connect(render_started, app, weak=False)
+    template_rendered.connect(render_finished, app, weak=False)
+
+    with app.app_context():
+        engine = db.engine
+
+    def before_cursor(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def after_cursor(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_start'].pop()
+        in_request = has_request_context() and 'metrics' in g
+        if in_request:
+            g.metrics['sql_count'] += 1
+            g.metrics['sql_time'] += elapsed
+        if elapsed >= slow_seconds:
+            endpoint = _endpoint() if has_request_context() else 'background'
+            logger.warning('Slow query (%.1f ms) in %s: %s', elapsed * 1000, endpoint, statement)
+            store.observe_slow_query(endpoint)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor)
+    event.listen(engine, 'after_cursor_execute', after_cursor)
+
+
+def metrics_response():
+    """Body for /admin/metrics; requires an admin session or the METRICS_TOKEN bearer token"""
+    store = current_app.extensions.get('metrics_store')
+    if store is None:
+        abort(404)
+    token = current_app.config.get('METRICS_TOKEN')
+    bearer = request.headers.get('Authorization', '')
+    if not session.get('admin') and not (token and bearer == f'Bearer {token}'):
+        abort(403)
+    store.flush()
+    return render_prometheus(store.read())
@@ -1,4 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect
+from contextlib import contextmanager
 from datetime import datetime
 
 db = SQLAlchemy()
@@ -9,10 +11,28 @@ class Product(db.Model):
     description = db.Column(db.Text, nullable=False)
     price = db.Column(db.Float, nullable=False)
     image = db.Column(db.String(200), nullable=True)
+    image_variants = db.Column(db.Text, nullable=True)  # JSON written by image_service.generate_variants
     availability = db.Column(db.String(20), nullable=False, default='available')  # available, out_of_stock, made_to_order
     size = db.Column(db.String(50), nullable=True)
     color = db.Column(db.String(50), nullable=True)
 
+    # Composite indexes for keyset pagination: every catalog filter/sort
+    # combination ends in `id` so the cursor seek stays an index range scan.
+    __table_args__ = (
+        db.Index('ix_product_availability_id', 'availability', 'id'),
+        db.Index('ix_product_availability_price_id', 'availability', 'price', 'id'),
+        db.Index('ix_product_availability_name_id', 'availability', 'name', 'id'),
+        db.Index('ix_product_price_id', 'price', 'id'),
+        db.Index('ix_product_name_id', 'name', 'id'),
+        db.Index('ix_product_color_id', 'color', 'id'),
+        db.Index('ix_product_color_price_id', 'color', 'price', 'id'),
+        db.Index('ix_product_color_name_id', 'color', 'name', 'id'),
+        db.Index('ix_product_size_id', 'size', 'id'),
+        db.Index('ix_product_size_price_id', 'size', 'price', 'id'),
+        db.Index('ix_product_size_name_id', 'size', 'name', 'id'),
+        db.Index('ix_product_image', 'image'),  # reference counts for shared uploads
+    )
+
 class CustomOrder(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     product_type = db.Column(db.String(50), nullable=False)
@@ -25,6 +45,84 @@ class CustomOrder(db.Model):
     phone = db.Column(db.String(20), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Newest-first keyset pagination and archiving by age; dashboard
+    # aggregates read OrderDailyRollup, so no other indexes slow inserts.
+    # AUTOINCREMENT: ids of archived orders are never handed out again
+    __table_args__ = (
+        db.Index('ix_custom_order_created_at_id', 'created_at', 'id'),
+        {'sqlite_autoincrement': True},
+    )
+
+class CustomOrderArchive(db.Model):
+    """Orders older than ORDER_ARCHIVE_DAYS, moved out of custom_order in batches"""
+    __tablename__ = 'custom_order_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # original CustomOrder.id
+    product_type = db.Column(db.String(50), nullable=False)
+    material = db.Column(db.String(50), nullable=True)
+    color = db.Column(db.String(50), nullable=True)
+    occasion = db.Column(db.String(50), nullable=True)
+    size = db.Column(db.String(50), nullable=True)
+    notes = db.Column(db.Text, nullable=True)
+    name = db.Column(db.String(100), nullable=False)
+    phone = db.Column(db.String(20), nullable=False)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class OrderDailyRollup(db.Model):
+    """Orders per day by product type, occasion and material; kept by a trigger on custom_order"""
+    __tablename__ = 'order_daily_rollup'
+    day = db.Column(db.Date, primary_key=True)
+    product_type = db.Column(db.String(50), primary_key=True)
+    occasion = db.Column(db.String(50), primary_key=True, default='')  # '' = not specified
+    material = db.Column(db.String(50), primary_key=True, default='')
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class NotificationOutbox(db.Model):
+    """Outgoing WhatsApp messages, written in the same transaction as the order"""
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(32), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    kind = db.Column(db.String(30), nullable=False)  # owner_notification, customer_confirmation, cart_link_code
+    order_id = db.Column(db.Integer, nullable=True)
+    status = db.Column(db.String(10), nullable=False, default='pending')  # pending, sending, sent, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_notification_outbox_due', 'status', 'next_attempt_at', 'id'),
+    )
+
+class WebSession(db.Model):
+    """Server-side session data; the cookie only carries `<sid>.<version>` (SESSION_BACKEND=server)"""
+    __tablename__ = 'web_session'
+    sid = db.Column(db.String(64), primary_key=True)
+    data = db.Column(db.Text, nullable=False)  # JSON
+    version = db.Column(db.Integer, nullable=False, default=1)  # bumped on every write
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_web_session_expires_at', 'expires_at'),
+    )
+
+class SavedCart(db.Model):
+    """Cart shared between a customer's devices, keyed by their phone number"""
+    __tablename__ = 'saved_cart'
+    phone = db.Column(db.String(20), primary_key=True)
+    cart = db.Column(db.Text, nullable=False)  # JSON {product_id: quantity}
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class CartLinkCode(db.Model):
+    """One-time code sent by WhatsApp to prove a visitor owns a phone before it gets that saved cart"""
+    __tablename__ = 'cart_link_code'
+    phone = db.Column(db.String(20), primary_key=True)
+    code_hash = db.Column(db.String(64), nullable=False)  # HMAC-SHA256 of phone and code, keyed by SECRET_KEY
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    sent_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
 class Admin(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(50), unique=True, nullable=False)
@@ -33,3 +131,79 @@ class Admin(db.Model):
 class Settings(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     whatsapp_number = db.Column(db.String(20), nullable=False, default='8132981738')
+    # Bumped on every change so worker-local caches can detect stale copies
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    # Bumped whenever products are added, edited or deleted (keys page caches/ETags)
+    catalog_version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+
+def upgrade_schema():
+    """Bring an existing database up to date with the models.
+
+    db.create_all() only creates missing tables, so columns and indexes
+    added to a model later are applied here. Must run in an app context.
+    """
+    db.create_all()
+    inspector = inspect(db.engine)
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            existing = {col['name'] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    col_type = column.type.compile(dialect=db.engine.dialect)
+                    ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'
+                    if column.server_default is not None:
+                        ddl += f" DEFAULT '{column.server_default.arg}'"
+                    conn.exec_driver_sql(ddl)
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+
+def apply_sqlite_profile(engine, pragmas):
+    """Apply PRAGMAs to every new SQLite connection and take over BEGIN for writers.
+
+    Connections opened with execution_options(sqlite_immediate=True) get
+    BEGIN IMMEDIATE, which takes the write lock up front instead of failing
+    with "database is locked" when a read upgrades to a write. All other
+    connections keep pysqlite's default of opening a transaction only
+    before the first INSERT/UPDATE/DELETE, so ORM reads never hold a WAL
+    snapshot that a later write in the same session could not upgrade.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+    @event.listens_for(engine, 'begin')
+    def _on_begin(conn):
+        dbapi_connection = conn.connection.dbapi_connection
+        if conn.get_execution_options().get('sqlite_immediate'):
+            dbapi_connection.isolation_level = None  # SQLAlchemy's BEGIN, not pysqlite's
+            conn.exec_driver_sql('BEGIN IMMEDIATE')
+        else:
+            dbapi_connection.isolation_level = ''  # pysqlite default (set back after a writer used it)
+
+
+def init_db(app):
+    """Bind db to the app and apply the SQLITE_PRAGMAS engine profile"""
+    db.init_app(app)
+    with app.app_context():
+        apply_sqlite_profile(db.engine, app.config.get('SQLITE_PRAGMAS', {}))
+
+
+@contextmanager
+def write_transaction(engine=None):
+    """Short write transaction that holds the SQLite write lock from BEGIN.
+
+    Yields a Core connection; commits on exit, rolls back on error. Keep
+    the body to a few INSERT/UPDATE statements so writers queue briefly on
+    busy_timeout rather than erroring.
+    """
+    engine = engine if engine is not None else db.engine
+    with engine.connect().execution_options(sqlite_immediate=True) as conn:
+        with conn.begin():
+            yield conn
@@ -0,0 +1,299 @@
+"""
+Notification Service Module
+Persisted outbox and background sender for Twilio WhatsApp messages.
+
+custom_order writes its notifications into notification_outbox in the same
+transaction as the order, then returns. A background OutboxWorker (a
+daemon thread per gunicorn worker, or `flask --app app notification-worker`
+as a separate process) claims due rows in batches, sends them over one
+kept-alive connection and retries failures with exponential backoff.
+"""
+
+import base64
+import logging
+import random
+import threading
+from datetime import datetime, timedelta
+from http.client import HTTPConnection, HTTPSConnection, HTTPException
+from urllib.parse import urlencode, urlsplit
+
+from sqlalchemy import select, update
+
+from models import db, NotificationOutbox, write_transaction
+from whatsapp_service import (format_phone_number, build_custom_order_message,
+                              build_order_confirmation_message, build_cart_link_code_message)
+
+logger = logging.getLogger(__name__)
+
+outbox = NotificationOutbox.__table__
+
+
+class PermanentError(Exception):
+    """The provider rejected the message; retrying will not help"""
+
+
+class TwilioTransport:
+    """Sends WhatsApp messages through the Twilio Messages REST API"""
+
+    def __init__(self, account_sid, auth_token, from_number, base_url='https://api.twilio.com', timeout=10):
+        self.account_sid = account_sid
+        self.from_number = from_number
+        self.timeout = timeout
+        url = urlsplit(base_url)
+        self._scheme, self._netloc, self._prefix = url.scheme, url.netloc, url.path.rstrip('/')
+        token = base64.b64encode(f'{account_sid}:{auth_token}'.encode()).decode()
+        self._headers = {'Authorization': f'Basic {token}',
+                         'Content-Type': 'application/x-www-form-urlencoded'}
+        self._conn = None
+
+    def _connection(self):
+        if self._conn is None:
+            cls = HTTPSConnection if self._scheme == 'https' else HTTPConnection
+            self._conn = cls(self._netloc, timeout=self.timeout)
+        return self._conn
+
+    def send(self, recipient, body):
+        path = f'{self._prefix}/2010-04-01/Accounts/{self.account_sid}/Messages.json'
+        payload = urlencode({'From': self.from_number,
+                             'To': f'whatsapp:+{format_phone_number(recipient)}',
+                             'Body': body})
+        conn = self._connection()
+        try:
+            conn.request('POST', path, body=payload, headers=self._headers)
+            response = conn.getresponse()
+            data = response.read()
+        except (OSError, HTTPException):
+            self.close()
+            raise
+        if response.status in (200, 201):
+            return
+        message = f'HTTP {response.status}: {data[:200].decode(errors="replace")}'
+        if 400 <= response.status < 500 and response.status != 429:
+            raise PermanentError(message)
+        raise RuntimeError(message)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class LogTransport:
+    """Development transport: logs messages instead of sending them"""
+
+    def send(self, recipient, body):
+        logger.info('WhatsApp to %s: %s', recipient, body)
+
+    def close(self):
+        pass
+
+
+def make_transport(config):
+    """
+    Build the transport named by NOTIFICATION_TRANSPORT
+
+    Returns:
+        Transport or None when notifications are off or Twilio is not configured
+    """
+    if not notifications_enabled(config):
+        return None
+    if config.get('NOTIFICATION_TRANSPORT', 'twilio') == 'log':
+        return LogTransport()
+    return TwilioTransport(config['TWILIO_ACCOUNT_SID'], config['TWILIO_AUTH_TOKEN'],
+                           config['TWILIO_WHATSAPP_NUMBER'],
+                           config.get('TWILIO_API_BASE', 'https://api.twilio.com'))
+
+
+def notifications_enabled(config):
+    """True when make_transport() can build a transport, so queued messages will be sent"""
+    name = config.get('NOTIFICATION_TRANSPORT', 'twilio')
+    if name == 'log':
+        return True
+    return name == 'twilio' and bool(config.get('TWILIO_ACCOUNT_SID')) and bool(config.get('TWILIO_AUTH_TOKEN'))
+
+
+def enqueue_order_notifications(conn, order_id, order_details, owner_number):
+    """
+    Queue the owner notification and customer confirmation for an order
+
+    Args:
+        conn: the Core connection of the transaction that inserted the order
+        order_id (int): new order id
+        order_details (dict): order form values
+        owner_number (str): shop WhatsApp number
+    """
+    conn.execute(outbox.insert(), [
+        {'recipient': owner_number, 'kind': 'owner_notification', 'order_id': order_id,
+         'body': build_custom_order_message(order_details)},
+        {'recipient': order_details['phone'], 'kind': 'customer_confirmation', 'order_id': order_id,
+         'body': build_order_confirmation_message(order_id, order_details['product_type'])},
+    ])
+
+
+def enqueue_cart_link_code(conn, phone, code):
+    """Queue the WhatsApp message carrying a cart-sync code (same transaction as the code row)"""
+    conn.execute(outbox.insert(), [
+        {'recipient': phone, 'kind': 'cart_link_code', 'body': build_cart_link_code_message(code)},
+    ])
+
+
+def claim_batch(engine, batch_size, lease_seconds):
+    """
+    Atomically claim up to batch_size due messages
+
+    Claimed rows move to 'sending' with a lease; if this process dies the
+    lease expires and another worker picks them up again.
+    """
+    now = datetime.utcnow()
+    with write_transaction(engine) as conn:
+        ids = conn.execute(
+            select(outbox.c.id)
+            .where(outbox.c.status.in_(('pending', 'sending')), outbox.c.next_attempt_at <= now)
+            .order_by(outbox.c.next_attempt_at, outbox.c.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return []
+        conn.execute(update(outbox).where(outbox.c.id.in_(ids))
+                     .values(status='sending', next_attempt_at=now + timedelta(seconds=lease_seconds)))
+        return conn.execute(select(outbox.c.id, outbox.c.recipient, outbox.c.body, outbox.c.attempts)
+                            .where(outbox.c.id.in_(ids)).order_by(outbox.c.id)).all()
+
+
+def backoff_seconds(attempts, base, cap):
+    """Exponential backoff with jitter for the given attempt number (1-based)"""
+    delay = min(cap, base * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def send_batch(engine, transport, config):
+    """
+    Claim and send one batch, then record every result in one transaction
+
+    Returns:
+        int: number of messages claimed (0 when the outbox is drained)
+    """
+    batch = claim_batch(engine, config.get('NOTIFICATION_BATCH_SIZE', 20),
+                        config.get('NOTIFICATION_LEASE_SECONDS', 120))
+    if not batch:
+        return 0
+    max_attempts = config.get('NOTIFICATION_MAX_ATTEMPTS', 6)
+    base = config.get('NOTIFICATION_BACKOFF_SECONDS', 30)
+    cap = config.get('NOTIFICATION_MAX_BACKOFF_SECONDS', 3600)
+
+    sent, failed = [], []
+    for row in batch:
+        try:
+            transport.send(row.recipient, row.body)
+            sent.append(row.id)
+        except PermanentError as exc:
+            failed.append((row, str(exc), True))
+        except Exception as exc:  # network errors, 5xx, 429: retry later
+            failed.append((row, str(exc) or exc.__class__.__name__, False))
+
+    now = datetime.utcnow()
+    with write_transaction(engine) as conn:
+        if sent:
+            conn.execute(update(outbox).where(outbox.c.id.in_(sent))
+                         .values(status='sent', sent_at=now, attempts=outbox.c.attempts + 1, last_error=None))
+        for row, error, permanent in failed:
+            attempts = row.attempts + 1
+            give_up = permanent or attempts >= max_attempts
+            conn.execute(update(outbox).where(outbox.c.id == row.id).values(
+                status='failed' if give_up else 'pending',
+                attempts=attempts,
+                last_error=error[:500],
+                next_attempt_at=now + timedelta(seconds=0 if give_up else backoff_seconds(attempts, base, cap)),
+            ))
+    if failed:
+        logger.warning('Outbox: %d sent, %d failed', len(sent), len(failed))
+    return len(batch)
+
+
+def drain_outbox(engine, transport, config):
+    """Send batches until nothing is due; returns the number of messages handled"""
+    total = 0
+    while True:
+        handled = send_batch(engine, transport, config)
+        if not handled:
+            return total
+        total += handled
+
+
+class OutboxWorker(threading.Thread):
+    """Background thread that drains the outbox when woken or every poll interval"""
+
+    def __init__(self, app):
+        super().__init__(name='outbox-worker', daemon=True)
+        self.app = app
+        self.wakeup = threading.Event()
+        self.stopping = False
+
+    def run(self):
+        with self.app.app_context():
+            engine = db.engine
+        config = self.app.config
+        transport = make_transport(config)
+        if transport is None:
+            return
+        poll = config.get('NOTIFICATION_POLL_SECONDS', 15)
+        while not self.stopping:
+            try:
+                drain_outbox(engine, transport, config)
+            except Exception:
+                logger.exception('Outbox worker batch failed')
+            finally:
+                transport.close()
+            self.wakeup.wait(poll)
+            self.wakeup.clear()
+
+    def stop(self):
+        self.stopping = True
+        self.wakeup.set()
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def start_worker(app):
+    """Start this process's outbox thread once (after fork, on the first request)"""
+    global _worker
+    if app.config.get('NOTIFICATION_WORKER', 'thread') != 'thread':
+        return None
+    worker = _worker
+    if worker is not None and worker.is_alive():
+        return worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = OutboxWorker(app)
+            _worker.start()
+        return _worker
+
+
+def wake_worker(app):
+    """Start this process's outbox thread if needed and nudge it to send now"""
+    worker = start_worker(app)
+    if worker is not None:
+        worker.wakeup.set()
+
+
+def init_notifications(app):
+    """
+    Run the outbox thread in every web worker when NOTIFICATION_WORKER=thread
+
+    It starts on each process's first request rather than waiting for a
+    new order, so messages left pending or in 'sending' by a restart are
+    retried straight away.
+    """
+    if app.config.get('NOTIFICATION_WORKER', 'thread') != 'thread' or not notifications_enabled(app.config):
+        return
+
+    @app.before_request
+    def ensure_outbox_worker():
+        start_worker(app)
+
+
+def outbox_counts():
+    """Message counts per status, for diagnostics"""
+    rows = db.session.query(NotificationOutbox.status, db.func.count()).group_by(NotificationOutbox.status).all()
+    return {status: count for status, count in rows}
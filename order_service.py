@@ -0,0 +1,104 @@
+"""
+Order Service Module
+Write path for custom orders.
+
+Orders are inserted with a short BEGIN IMMEDIATE transaction on a Core
+connection, so a burst of submissions across gunicorn workers queues on
+SQLite's busy_timeout instead of failing with "database is locked".
+Dashboard statistics come from the daily rollups (see retention_service).
+"""
+
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, tuple_
+
+from catalog_service import encode_cursor, decode_cursor
+from models import db, CustomOrder, OrderDailyRollup, write_transaction
+from notification_service import enqueue_order_notifications
+
+OrderPage = namedtuple('OrderPage', ['items', 'next_cursor'])
+
+ORDER_FIELDS = ('product_type', 'material', 'color', 'occasion', 'size', 'notes', 'name', 'phone')
+
+
+def create_custom_order(order_details, owner_number=None):
+    """
+    Insert a custom order in its own short write transaction
+
+    Args:
+        order_details (dict): form values keyed by ORDER_FIELDS
+        owner_number (str): when given, the owner notification and customer
+            confirmation are queued in the notification outbox in the same
+            transaction as the order
+
+    Returns:
+        int: id of the new order
+    """
+    values = {field: order_details.get(field) for field in ORDER_FIELDS}
+    with write_transaction() as conn:
+        result = conn.execute(CustomOrder.__table__.insert().values(**values))
+        order_id = result.inserted_primary_key[0]
+        if owner_number:
+            enqueue_order_notifications(conn, order_id, values, owner_number)
+    return order_id
+
+
+def paginate_orders(cursor=None, per_page=25):
+    """
+    Fetch one page of orders, newest first, using keyset pagination
+
+    Args:
+        cursor (str): next_cursor from the previous page, or None for page 1
+        per_page (int): number of orders per page
+
+    Returns:
+        OrderPage: items for this page and the cursor for the next page (or None)
+    """
+    query = CustomOrder.query
+    after = decode_cursor(cursor)
+    if after and len(after) == 2:
+        try:
+            created_at = datetime.fromisoformat(after[0])
+        except (TypeError, ValueError):
+            created_at = None
+        if created_at is not None:
+            query = query.filter(tuple_(CustomOrder.created_at, CustomOrder.id) < (created_at, after[1]))
+    rows = query.order_by(CustomOrder.created_at.desc(), CustomOrder.id.desc()).limit(per_page + 1).all()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor([rows[-1].created_at.isoformat(), rows[-1].id])
+    return OrderPage(rows, next_cursor)
+
+
+def _grouped_counts(column):
+    total = func.sum(OrderDailyRollup.count)
+    rows = db.session.query(column, total).group_by(column).order_by(total.desc()).all()
+    return [(value or 'Not specified', count) for value, count in rows]
+
+
+def order_stats(days=30):
+    """
+    Dashboard aggregates read from order_daily_rollup
+
+    Covers archived orders too, and costs the same however many orders
+    have been placed.
+
+    Args:
+        days (int): how many recent days to include in the per-day series
+
+    Returns:
+        dict: total, per_day [(date, count)], by_product_type, by_occasion
+              and by_material
+    """
+    since = (datetime.utcnow() - timedelta(days=days)).date()
+    day, total = OrderDailyRollup.day, func.sum(OrderDailyRollup.count)
+    per_day = db.session.query(day, total).filter(day >= since).group_by(day).order_by(day.desc()).all()
+    return {
+        'total': db.session.query(total).scalar() or 0,
+        'per_day': [(date, count) for date, count in per_day],
+        'by_product_type': _grouped_counts(OrderDailyRollup.product_type),
+        'by_occasion': _grouped_counts(OrderDailyRollup.occasion),
+        'by_material': _grouped_counts(OrderDailyRollup.material),
+    }
@@ -0,0 +1,107 @@
+"""
+Page Cache Module
+Conditional GET and rendered-HTML caching for catalog pages.
+
+Catalog pages only change when an admin edits products (catalog_version)
+or settings (version), both served from the settings cache. The ETag and
+cache key are derived from those stamps, the deployed build and the route
+and its arguments, so a warm hit or a 304 costs no SQL and no template
+rendering, and a deploy never revalidates stale HTML.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, make_response, request, session
+
+from settings_service import get_settings
+
+DEFAULT_SIZE = 256
+
+
+class LRUCache:
+    """Small thread-safe LRU mapping with a fixed number of entries"""
+
+    def __init__(self, maxsize=DEFAULT_SIZE):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            return self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_pages = LRUCache()
+
+
+def _page_key(view_args):
+    settings = get_settings()
+    return (
+        request.endpoint,
+        tuple(sorted(view_args.items())),
+        tuple(sorted(request.args.items(multi=True))),
+        settings['catalog_version'],
+        settings['version'],
+        current_app.extensions.get('build_stamp'),
+    )
+
+
+def cached_page(view):
+    """
+    Serve a GET view with a strong ETag, 304s and an LRU of rendered HTML
+
+    The view must return a rendered template string. Requests with pending
+    flash messages bypass the cache, since those are per-visitor.
+    """
+    @wraps(view)
+    def wrapper(**view_args):
+        if not current_app.config.get('PAGE_CACHE_ENABLED', True) or session.get('_flashes'):
+            return view(**view_args)
+
+        key = _page_key(view_args)
+        etag = hashlib.sha1(repr(key).encode()).hexdigest()
+        if request.if_none_match.contains(etag):
+            response = make_response('', 304)
+        else:
+            body = _pages.get(key)
+            if body is None:
+                body = view(**view_args)
+                if not isinstance(body, str):
+                    return body
+                _pages.maxsize = current_app.config.get('PAGE_CACHE_SIZE', DEFAULT_SIZE)
+                _pages.set(key, body)
+            response = make_response(body)
+        response.set_etag(etag)
+        # Let browsers keep the page but revalidate it on every visit
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return wrapper
+
+
+def clear_page_cache():
+    """Drop every rendered page held by this worker"""
+    _pages.clear()
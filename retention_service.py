@@ -0,0 +1,177 @@
+"""
+Retention Service Module
+Daily order rollups and age-based archiving of custom orders.
+
+order_daily_rollup holds order counts per day by product type, occasion
+and material. A trigger on custom_order adds each new order to it inside
+the inserting transaction, so the dashboard reads a few hundred rollup
+rows instead of scanning every order. Orders older than
+ORDER_ARCHIVE_DAYS are moved to custom_order_archive in short batches by
+a background thread in each worker (or `flask --app app archive-orders`),
+which keeps the hot table and its index small. Archiving never changes
+the rollups.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, insert, literal, select
+
+from models import db, CustomOrder, CustomOrderArchive, write_transaction
+
+logger = logging.getLogger(__name__)
+
+orders = CustomOrder.__table__
+archive = CustomOrderArchive.__table__
+
+ROLLUP_TRIGGER = """CREATE TRIGGER IF NOT EXISTS custom_order_rollup_ai AFTER INSERT ON custom_order BEGIN
+    INSERT INTO order_daily_rollup (day, product_type, occasion, material, count)
+    VALUES (date(new.created_at), new.product_type, coalesce(new.occasion, ''), coalesce(new.material, ''), 1)
+    ON CONFLICT (day, product_type, occasion, material) DO UPDATE SET count = count + 1;
+END"""
+
+REBUILD_ROLLUPS = """INSERT INTO order_daily_rollup (day, product_type, occasion, material, count)
+    SELECT date(created_at), product_type, coalesce(occasion, ''), coalesce(material, ''), count(*)
+    FROM (SELECT created_at, product_type, occasion, material FROM custom_order
+          UNION ALL
+          SELECT created_at, product_type, occasion, material FROM custom_order_archive)
+    GROUP BY 1, 2, 3, 4"""
+
+# Indexes the dashboard's GROUP BY queries used before the rollups existed
+OBSOLETE_INDEXES = ('ix_custom_order_product_type', 'ix_custom_order_occasion')
+
+
+def ensure_order_ids():
+    """
+    Rebuild custom_order with AUTOINCREMENT ids if it was created without
+
+    Without it SQLite reuses the ids of archived orders once the table
+    empties, which collides in custom_order_archive and repeats order
+    numbers customers have already been sent. The sequence starts after
+    the highest live or archived id. Must run in an app context (called
+    from bootstrap, before ensure_order_rollups(), which recreates the
+    rollup trigger this drops).
+    """
+    with write_transaction(db.engine) as conn:
+        ddl = conn.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE type='table' AND name='custom_order'").scalar()
+        if ddl is None or 'AUTOINCREMENT' in ddl.upper():
+            return
+        conn.exec_driver_sql('ALTER TABLE custom_order RENAME TO custom_order_old')
+        conn.exec_driver_sql('DROP TRIGGER IF EXISTS custom_order_rollup_ai')
+        old_indexes = conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='custom_order_old' "
+            "AND sql IS NOT NULL").scalars().all()
+        for name in old_indexes:
+            conn.exec_driver_sql(f'DROP INDEX {name}')
+        orders.create(conn)
+        columns = ', '.join(column.name for column in orders.columns)
+        conn.exec_driver_sql(f'INSERT INTO custom_order ({columns}) SELECT {columns} FROM custom_order_old')
+        conn.exec_driver_sql('DROP TABLE custom_order_old')
+        conn.exec_driver_sql("DELETE FROM sqlite_sequence WHERE name = 'custom_order'")
+        conn.exec_driver_sql(
+            "INSERT INTO sqlite_sequence (name, seq) SELECT 'custom_order', max("
+            "(SELECT coalesce(max(id), 0) FROM custom_order), (SELECT coalesce(max(id), 0) FROM custom_order_archive))")
+
+
+def ensure_order_rollups():
+    """
+    Create the rollup trigger if missing, backfilling the rollups first
+
+    Must run in an app context (called from bootstrap). The backfill and
+    the trigger are created in one transaction so no order is missed or
+    counted twice.
+    """
+    with write_transaction(db.engine) as conn:
+        existed = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type='trigger' AND name='custom_order_rollup_ai'").first()
+        if not existed:
+            conn.exec_driver_sql('DELETE FROM order_daily_rollup')
+            conn.exec_driver_sql(REBUILD_ROLLUPS)
+            conn.exec_driver_sql(ROLLUP_TRIGGER)
+        for name in OBSOLETE_INDEXES:
+            conn.exec_driver_sql(f'DROP INDEX IF EXISTS {name}')
+
+
+def rebuild_order_rollups():
+    """Recount every rollup from the live and archived orders; returns the number of rollup rows"""
+    with write_transaction(db.engine) as conn:
+        conn.exec_driver_sql('DELETE FROM order_daily_rollup')
+        return conn.exec_driver_sql(REBUILD_ROLLUPS).rowcount
+
+
+def archive_orders(engine, older_than_days, batch_size=500):
+    """
+    Move orders created before the cutoff into custom_order_archive
+
+    Each batch is one short write transaction (copy, then delete), so
+    order inserts from the web workers only ever wait for one batch.
+
+    Returns:
+        int: number of orders archived
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    columns = [column.name for column in orders.columns]
+    moved = 0
+    archived_at = literal(datetime.utcnow(), archive.c.archived_at.type)
+    while True:
+        with write_transaction(engine) as conn:
+            ids = conn.execute(select(orders.c.id).where(orders.c.created_at < cutoff)
+                               .order_by(orders.c.created_at, orders.c.id).limit(batch_size)).scalars().all()
+            if ids:
+                conn.execute(insert(archive).from_select(
+                    columns + ['archived_at'],
+                    select(*[orders.c[name] for name in columns], archived_at).where(orders.c.id.in_(ids))))
+                conn.execute(delete(orders).where(orders.c.id.in_(ids)))
+        moved += len(ids)
+        if len(ids) < batch_size:
+            return moved
+
+
+class OrderArchiver(threading.Thread):
+    """Background thread that archives old orders every interval seconds"""
+
+    def __init__(self, app):
+        super().__init__(name='order-archiver', daemon=True)
+        self.app = app
+
+    def run(self):
+        with self.app.app_context():
+            engine = db.engine
+        config = self.app.config
+        while True:
+            try:
+                moved = archive_orders(engine, config['ORDER_ARCHIVE_DAYS'],
+                                       config.get('ORDER_ARCHIVE_BATCH', 500))
+                if moved:
+                    logger.info('Archived %d orders', moved)
+            except Exception:
+                logger.exception('Order archiving failed')
+            time.sleep(config.get('ORDER_ARCHIVE_INTERVAL_SECONDS', 3600))
+
+
+_archiver = None
+_archiver_lock = threading.Lock()
+
+
+def start_archiver(app):
+    """Start this process's archiver thread once (after fork, on the first request)"""
+    global _archiver
+    if _archiver is not None and _archiver.is_alive():
+        return
+    with _archiver_lock:
+        if _archiver is None or not _archiver.is_alive():
+            _archiver = OrderArchiver(app)
+            _archiver.start()
+
+
+def init_retention(app):
+    """Archive old orders in the background when ORDER_ARCHIVE_DAYS > 0"""
+    if not app.config.get('ORDER_ARCHIVE_DAYS') or app.config.get('ORDER_ARCHIVE_WORKER', 'thread') != 'thread':
+        return
+
+    @app.before_request
+    def ensure_archiver():
+        start_archiver(app)
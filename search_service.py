@@ -0,0 +1,134 @@
+"""
+Search Service Module
+Full-text product search backed by an SQLite FTS5 index.
+
+product_fts is an external-content FTS5 table over product.name,
+description, color and size. Triggers on the product table keep it in sync
+for every write path (admin forms, bulk SQL, imports), and results are
+ranked with bm25 so name matches outrank description matches.
+
+bm25 has to score every row a query matches before it can sort them, so a
+common word or a short prefix ("basket", "bas") would score most of the
+catalog on every keystroke. search_products() therefore ranks only the
+newest SEARCH_RANK_CANDIDATES matches, which FTS5 can stream straight off
+its rowid-ordered doclists without scoring the rest.
+"""
+
+import re
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from models import db, Product
+
+# bm25 column weights: name, description, color, size
+BM25_WEIGHTS = (10.0, 1.0, 3.0, 2.0)
+MAX_TERMS = 8
+
+SCHEMA = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(
+        name, description, color, size,
+        content='product', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_ai AFTER INSERT ON product BEGIN
+        INSERT INTO product_fts(rowid, name, description, color, size)
+        VALUES (new.id, new.name, new.description, new.color, new.size);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_ad AFTER DELETE ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, name, description, color, size)
+        VALUES ('delete', old.id, old.name, old.description, old.color, old.size);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_au AFTER UPDATE OF name, description, color, size ON product BEGIN
+        INSERT INTO product_fts(product_fts, rowid, name, description, color, size)
+        VALUES ('delete', old.id, old.name, old.description, old.color, old.size);
+        INSERT INTO product_fts(rowid, name, description, color, size)
+        VALUES (new.id, new.name, new.description, new.color, new.size);
+    END""",
+)
+
+
+def ensure_search_index():
+    """
+    Create the FTS5 table and sync triggers if missing
+
+    Must run in an app context. A newly created index is populated from
+    the existing product rows.
+
+    Returns:
+        bool: False if this SQLite build has no FTS5 support
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return False
+    with db.engine.begin() as conn:
+        existed = conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='product_fts'").first()
+        try:
+            for statement in SCHEMA:
+                conn.exec_driver_sql(statement)
+        except OperationalError:
+            return False
+        if not existed:
+            conn.exec_driver_sql("INSERT INTO product_fts(product_fts) VALUES ('rebuild')")
+    return True
+
+
+def rebuild_search_index():
+    """Re-index every product row from scratch and return the row count"""
+    with db.engine.begin() as conn:
+        conn.exec_driver_sql("INSERT INTO product_fts(product_fts) VALUES ('rebuild')")
+        conn.exec_driver_sql("INSERT INTO product_fts(product_fts) VALUES ('optimize')")
+    return db.session.query(Product.id).count()
+
+
+def build_match_query(query):
+    """
+    Turn free text into a safe FTS5 MATCH expression
+
+    Every word must match; the last word is a prefix so results update
+    as the customer types ("laundry bas" finds "Large Laundry Basket").
+    """
+    terms = re.findall(r'\w+', query or '')[:MAX_TERMS]
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search_products(query, limit=50, candidates=500):
+    """
+    Search products ranked by bm25
+
+    Args:
+        query (str): free text from the search box
+        limit (int): maximum number of results
+        candidates (int): rank only the newest this-many matching products
+
+    Returns:
+        list: Product objects, best match first
+    """
+    match = build_match_query(query)
+    if match is None:
+        return []
+    weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+    try:
+        ids = [row[0] for row in db.session.execute(
+            text(f'SELECT rowid FROM ('
+                 f'SELECT rowid, bm25(product_fts, {weights}) AS score FROM product_fts '
+                 f'WHERE product_fts MATCH :match ORDER BY rowid DESC LIMIT :candidates'
+                 f') ORDER BY score, rowid DESC LIMIT :limit'),
+            {'match': match, 'candidates': max(candidates, limit), 'limit': limit})]
+    except OperationalError:
+        db.session.rollback()
+        return _like_search(query, limit)
+    if not ids:
+        return []
+    products = {p.id: p for p in Product.query.filter(Product.id.in_(ids)).all()}
+    return [products[pid] for pid in ids if pid in products]
+
+
+def _like_search(query, limit):
+    """Fallback for SQLite builds without FTS5: substring match on the name"""
+    pattern = f"%{query.strip()}%"
+    return Product.query.filter(Product.name.ilike(pattern)).order_by(Product.name).limit(limit).all()
@@ -0,0 +1,199 @@
+"""
+Session Service Module
+Optional server-side sessions: the cookie carries only an opaque id.
+
+With SESSION_BACKEND=server, session data (the cart, flashes, admin flag)
+lives in the web_session table and the cookie is just `<sid>.<version>`,
+so it stays a few dozen bytes however large the cart grows. Each worker
+keeps recently used sessions in an LRU; the version in the cookie tells it
+whether its copy is current, so a warm request reads no SQL and only
+requests that change the session write a row. Expired rows are deleted by
+a background thread in each worker.
+"""
+
+import json
+import logging
+import re
+import secrets
+import threading
+import time
+from datetime import datetime
+
+from flask.sessions import SecureCookieSession, SessionInterface
+from sqlalchemy import delete, select, update
+
+from models import db, WebSession, write_transaction
+from page_cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+sessions = WebSession.__table__
+
+COOKIE_RE = re.compile(r'^([A-Za-z0-9_-]{43})\.(\d{1,9})$')
+GC_BATCH = 1000
+
+
+class ServerSession(SecureCookieSession):
+    """Session dict that remembers which stored row (and version) it came from"""
+
+    def __init__(self, initial=None, sid=None, version=0, expires_at=None, stale_cookie=False):
+        super().__init__(initial)
+        self.sid = sid
+        self.version = version
+        self.expires_at = expires_at
+        self.stale_cookie = stale_cookie  # cookie names an older version than the stored row
+
+
+class ServerSessionInterface(SessionInterface):
+    """Flask session interface backed by the web_session table with a per-worker LRU"""
+
+    def __init__(self, cache_size=1024, gc_seconds=600):
+        self.cache = LRUCache(cache_size)  # sid -> (version, data JSON, expires_at)
+        self.gc_seconds = gc_seconds
+
+    def open_session(self, app, request):
+        start_reaper(app, self.gc_seconds)
+        match = COOKIE_RE.match(request.cookies.get(self.get_cookie_name(app), ''))
+        if not match:
+            return ServerSession()
+        sid, version = match.group(1), int(match.group(2))
+        now = datetime.utcnow()
+
+        cached = self.cache.get(sid)
+        if cached is None or cached[0] != version or cached[2] <= now:
+            with db.engine.connect() as conn:
+                row = conn.execute(
+                    select(sessions.c.version, sessions.c.data, sessions.c.expires_at)
+                    .where(sessions.c.sid == sid, sessions.c.expires_at > now)).first()
+            if row is None:
+                self.cache.pop(sid)
+                return ServerSession()
+            cached = tuple(row)
+            self.cache.set(sid, cached)
+        stored_version, data, expires_at = cached
+        # Decoded per request so views can mutate nested values without touching the cache
+        return ServerSession(json.loads(data), sid, stored_version, expires_at,
+                             stale_cookie=stored_version != version)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        secure = self.get_cookie_secure(app)
+        samesite = self.get_cookie_samesite(app)
+        httponly = self.get_cookie_httponly(app)
+
+        if session.accessed:
+            response.vary.add('Cookie')
+
+        if not session:
+            if session.modified:
+                if session.sid:
+                    self._delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path, secure=secure,
+                                       samesite=samesite, httponly=httponly)
+                response.vary.add('Cookie')
+            return
+
+        lifetime = app.permanent_session_lifetime
+        now = datetime.utcnow()
+        expires_at = now + lifetime
+        if session.modified or session.sid is None:
+            self._write(session, expires_at)
+        elif session.expires_at - now < lifetime / 2:
+            # Slide the expiry at most every half lifetime, not on every request
+            self._touch(session, expires_at)
+        elif not (session.stale_cookie or self.should_set_cookie(app, session)):
+            return
+
+        response.set_cookie(name, f'{session.sid}.{session.version}',
+                            expires=self.get_expiration_time(app, session), httponly=httponly,
+                            domain=domain, path=path, secure=secure, samesite=samesite)
+        response.vary.add('Cookie')
+
+    def _write(self, session, expires_at):
+        data = json.dumps(dict(session), separators=(',', ':'))
+        with write_transaction(db.engine) as conn:
+            if session.sid is not None:
+                version = conn.execute(
+                    update(sessions).where(sessions.c.sid == session.sid)
+                    .values(data=data, version=sessions.c.version + 1, expires_at=expires_at)
+                    .returning(sessions.c.version)).scalar()
+            else:
+                version = None
+            if version is None:  # new session, or its row expired and was collected
+                session.sid = secrets.token_urlsafe(32)
+                version = 1
+                conn.execute(sessions.insert().values(sid=session.sid, data=data, version=version,
+                                                      expires_at=expires_at))
+        session.version, session.expires_at = version, expires_at
+        self.cache.set(session.sid, (version, data, expires_at))
+
+    def _touch(self, session, expires_at):
+        with write_transaction(db.engine) as conn:
+            conn.execute(update(sessions).where(sessions.c.sid == session.sid).values(expires_at=expires_at))
+        cached = self.cache.get(session.sid)
+        if cached is not None:
+            self.cache.set(session.sid, (cached[0], cached[1], expires_at))
+        session.expires_at = expires_at
+
+    def _delete(self, sid):
+        with write_transaction(db.engine) as conn:
+            conn.execute(delete(sessions).where(sessions.c.sid == sid))
+        self.cache.pop(sid)
+
+
+def purge_expired_sessions(engine, batch_size=GC_BATCH):
+    """Delete expired session rows in short batches; returns the number removed"""
+    removed = 0
+    while True:
+        with write_transaction(engine) as conn:
+            expired = select(sessions.c.sid).where(sessions.c.expires_at <= datetime.utcnow()).limit(batch_size)
+            count = conn.execute(delete(sessions).where(sessions.c.sid.in_(expired))).rowcount
+        removed += count
+        if count < batch_size:
+            return removed
+
+
+class SessionReaper(threading.Thread):
+    """Background thread that purges expired sessions every gc_seconds"""
+
+    def __init__(self, app, gc_seconds):
+        super().__init__(name='session-reaper', daemon=True)
+        self.app = app
+        self.gc_seconds = gc_seconds
+
+    def run(self):
+        with self.app.app_context():
+            engine = db.engine
+        while True:
+            try:
+                removed = purge_expired_sessions(engine)
+                if removed:
+                    logger.info('Purged %d expired sessions', removed)
+            except Exception:
+                logger.exception('Session purge failed')
+            time.sleep(self.gc_seconds)
+
+
+_reaper = None
+_reaper_lock = threading.Lock()
+
+
+def start_reaper(app, gc_seconds):
+    """Start this process's reaper thread once (after fork, on the first request)"""
+    global _reaper
+    if _reaper is not None and _reaper.is_alive():
+        return
+    with _reaper_lock:
+        if _reaper is None or not _reaper.is_alive():
+            _reaper = SessionReaper(app, gc_seconds)
+            _reaper.start()
+
+
+def init_sessions(app):
+    """Install the server-side session interface when SESSION_BACKEND=server"""
+    if app.config.get('SESSION_BACKEND', 'cookie') != 'server':
+        return
+    app.session_interface = ServerSessionInterface(app.config.get('SESSION_CACHE_SIZE', 1024),
+                                                   app.config.get('SESSION_GC_SECONDS', 600))
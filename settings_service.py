@@ -0,0 +1,110 @@
+"""
+Settings Service Module
+Process-local cache for the single Settings row.
+
+Each gunicorn worker keeps its own copy. After SETTINGS_CACHE_TTL seconds
+the worker re-reads only Settings.version and reloads the row if another
+worker bumped it, so an admin change reaches every worker within one TTL
+while ordinary requests never touch the database for settings.
+"""
+
+import os
+import threading
+import time
+
+from flask import current_app, has_app_context
+
+from config import WHATSAPP_NUMBER
+from models import db, Settings
+
+DEFAULT_TTL = 30
+
+_lock = threading.Lock()
+_cache = {'values': None, 'version': None, 'checked_at': 0.0}
+
+
+def _ttl():
+    if has_app_context():
+        return current_app.config.get('SETTINGS_CACHE_TTL', DEFAULT_TTL)
+    return DEFAULT_TTL
+
+
+def _defaults():
+    return {'whatsapp_number': os.getenv('WHATSAPP_NUMBER', WHATSAPP_NUMBER),
+            'catalog_version': 0, 'version': 0}
+
+
+def _refresh():
+    """Re-validate the cached row against Settings.version, reloading if changed"""
+    version = db.session.query(Settings.version).order_by(Settings.id).limit(1).scalar()
+    if version is None:
+        values = _defaults()
+    elif version != _cache['version'] or _cache['values'] is None:
+        settings = Settings.query.order_by(Settings.id).first()
+        values = {'whatsapp_number': settings.whatsapp_number,
+                  'catalog_version': settings.catalog_version,
+                  'version': version}
+    else:
+        values = _cache['values']
+    _cache.update(values=values, version=version, checked_at=time.monotonic())
+    return values
+
+
+def get_settings():
+    """
+    Get the current settings values, served from the worker cache
+
+    Returns:
+        dict: settings values (whatsapp_number, catalog_version, version)
+    """
+    values = _cache['values']
+    if values is not None and time.monotonic() - _cache['checked_at'] < _ttl():
+        return values
+    if not has_app_context():
+        return values or _defaults()
+    with _lock:
+        return _refresh()
+
+
+def get_whatsapp_number():
+    """Get WhatsApp number from the settings cache"""
+    return get_settings()['whatsapp_number']
+
+
+def update_settings(**values):
+    """
+    Write settings to the database and bump the version stamp
+
+    Other workers pick up the change on their next TTL check; this worker
+    sees it immediately.
+    """
+    settings = Settings.query.order_by(Settings.id).first()
+    if settings is None:
+        settings = Settings(**values)
+        db.session.add(settings)
+    else:
+        for key, value in values.items():
+            setattr(settings, key, value)
+        settings.version = Settings.version + 1
+    db.session.commit()
+    invalidate()
+
+
+def bump_catalog_version():
+    """
+    Mark the product catalog as changed
+
+    Call after committing product changes. Cached pages and ETags keyed on
+    the old catalog_version stop matching on every worker within one TTL.
+    """
+    Settings.query.update({Settings.catalog_version: Settings.catalog_version + 1,
+                           Settings.version: Settings.version + 1},
+                          synchronize_session=False)
+    db.session.commit()
+    invalidate()
+
+
+def invalidate():
+    """Drop this worker's cached copy so the next read reloads it"""
+    with _lock:
+        _cache.update(values=None, version=None, checked_at=0.0)
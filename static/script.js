@@ -17,3 +17,86 @@ document.querySelectorAll('nav a').forEach(link => {
         }
     });
 });
+
+// Cart buttons: with JS, add/remove update the cart in place through the
+// JSON endpoints; without it the plain links still work (redirect + flash)
+function postCart(url) {
+    return fetch(url, {
+        method: 'POST',
+        credentials: 'same-origin',
+        headers: { 'Accept': 'application/json' }
+    }).then(response => {
+        if (!response.ok) {
+            throw new Error('Cart request failed: ' + response.status);
+        }
+        return response.json();
+    });
+}
+
+function showMessage(text) {
+    let box = document.querySelector('.flash-messages');
+    if (!box) {
+        box = document.createElement('div');
+        box.className = 'flash-messages';
+        document.querySelector('main').prepend(box);
+    }
+    box.innerHTML = '';
+    const message = document.createElement('p');
+    message.textContent = text;
+    box.appendChild(message);
+}
+
+function updateCartPage(link, cart) {
+    const item = link.closest('[data-cart-item]');
+    if (item) {
+        item.remove();
+    }
+    const container = document.querySelector('[data-cart]');
+    if (container && cart.count === 0) {
+        container.outerHTML = '<p>Your cart is empty.</p>';
+        return;
+    }
+    const total = document.querySelector('[data-cart-total]');
+    if (total) {
+        total.textContent = cart.total.toFixed(2);
+    }
+    const order = document.getElementById('whatsapp-order');
+    if (order && cart.whatsapp_link) {
+        order.href = cart.whatsapp_link;
+    }
+}
+
+if (window.fetch) {
+    document.addEventListener('click', event => {
+        const link = event.target.closest('[data-cart-add], [data-cart-remove]');
+        if (!link) {
+            return;
+        }
+        event.preventDefault();
+        const adding = link.hasAttribute('data-cart-add');
+        const url = adding ? link.dataset.cartAdd : link.dataset.cartRemove;
+        link.classList.add('busy');
+        postCart(url)
+            .then(cart => {
+                if (adding) {
+                    showMessage(`Product added to cart! (${cart.count} item${cart.count === 1 ? '' : 's'})`);
+                } else {
+                    updateCartPage(link, cart);
+                }
+            })
+            .catch(() => {
+                window.location.href = link.href;  // fall back to the non-JS route
+            })
+            .finally(() => link.classList.remove('busy'));
+    });
+}
+
+// Admin dashboard: tick or untick every product on the page for bulk actions
+document.addEventListener('change', event => {
+    if (!event.target.matches('[data-select-all]')) {
+        return;
+    }
+    document.querySelectorAll('input[name="product_ids"]').forEach(box => {
+        box.checked = event.target.checked;
+    });
+});
@@ -0,0 +1,133 @@
+"""
+Throttle Service Module
+Token-bucket login throttling shared by every gunicorn worker.
+
+admin_login checks one bucket per client IP and one per username before it
+looks up the admin or hashes anything. Buckets live in a small SQLite file
+(THROTTLE_DB) and are refilled and consumed by a single atomic UPSERT, so
+all workers see the same counts. Once a bucket is empty the worker also
+remembers "blocked until" in memory, so during a flood each rejected
+request is a dictionary lookup and never touches SQLite.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from page_cache import LRUCache
+
+SCHEMA = """CREATE TABLE IF NOT EXISTS buckets (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+)"""
+
+# Refill, then take one token only if at least one is available; no row comes back when empty
+CONSUME = """INSERT INTO buckets (key, tokens, updated) VALUES (:key, :burst - 1, :now)
+ON CONFLICT (key) DO UPDATE SET
+    tokens = min(:burst, tokens + (:now - updated) * :rate) - 1,
+    updated = :now
+WHERE min(:burst, tokens + (:now - updated) * :rate) >= 1
+RETURNING tokens"""
+
+PRUNE_SECONDS = 300
+
+
+class TokenBucketStore:
+    """Token buckets in a shared SQLite file plus a per-worker cache of empty ones"""
+
+    def __init__(self, path, deny_cache_size=4096):
+        self.path = path
+        self._local = threading.local()
+        self._blocked = LRUCache(deny_cache_size)  # key -> time.time() when a token is next available
+        self._last_prune = time.time()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():  # never reuse a handle across fork
+            conn = sqlite3.connect(self.path, timeout=2, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')  # losing a few counts in a crash is harmless
+            conn.execute(SCHEMA)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def consume(self, key, burst, per_minute):
+        """
+        Take one token from a bucket
+
+        Args:
+            key (str): bucket name, e.g. 'ip:203.0.113.9'
+            burst (int): bucket capacity
+            per_minute (float): refill rate (must be > 0)
+
+        Returns:
+            float: 0 if allowed, otherwise seconds until the next token
+        """
+        now = time.time()
+        blocked_until = self._blocked.get(key)
+        if blocked_until is not None:
+            if blocked_until > now:
+                return blocked_until - now
+            self._blocked.pop(key)
+
+        rate = per_minute / 60.0
+        conn = self._connection()
+        if conn.execute(CONSUME, {'key': key, 'burst': burst, 'now': now, 'rate': rate}).fetchone():
+            self._maybe_prune(conn, now, burst / rate)
+            return 0
+        row = conn.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+        if row is None:  # pruned in between: treat as a fresh bucket
+            return 0
+        tokens, updated = row
+        available = min(burst, tokens + (now - updated) * rate)
+        wait = (1 - available) / rate
+        self._blocked.set(key, now + wait)
+        return wait
+
+    def _maybe_prune(self, conn, now, refill_seconds):
+        # A bucket idle long enough to be full again is the same as no row at all
+        if now - self._last_prune < PRUNE_SECONDS:
+            return
+        self._last_prune = now
+        conn.execute('DELETE FROM buckets WHERE updated < ?', (now - max(refill_seconds, PRUNE_SECONDS),))
+
+    def reset(self, key):
+        """Refill a bucket completely (e.g. after a successful login)"""
+        self._blocked.pop(key)
+        self._connection().execute('DELETE FROM buckets WHERE key = ?', (key,))
+
+
+def init_throttle(app):
+    """Create the shared bucket store when LOGIN_THROTTLE_ENABLED is set"""
+    if not app.config.get('LOGIN_THROTTLE_ENABLED'):
+        return
+    path = app.config.get('THROTTLE_DB') or os.path.join(app.instance_path, 'throttle.db')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    app.extensions['login_throttle'] = TokenBucketStore(path)
+
+
+def check_login(app, ip, username):
+    """
+    Spend one login attempt for this IP and this username
+
+    Returns:
+        int: 0 if the attempt may proceed, otherwise seconds to wait (Retry-After)
+    """
+    store = app.extensions.get('login_throttle')
+    if store is None:
+        return 0
+    config = app.config
+    wait = store.consume(f'ip:{ip}', config['LOGIN_IP_BURST'], config['LOGIN_IP_PER_MINUTE'])
+    if not wait:
+        wait = store.consume(f'user:{username[:50].lower()}', config['LOGIN_USER_BURST'],
+                             config['LOGIN_USER_PER_MINUTE'])
+    return int(wait + 0.999)
+
+
+def login_succeeded(app, username):
+    """Give the admin their username budget back once they get the password right"""
+    store = app.extensions.get('login_throttle')
+    if store is not None:
+        store.reset(f'user:{username[:50].lower()}')
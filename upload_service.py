@@ -0,0 +1,171 @@
+"""
+Upload Service Module
+Content-addressed storage for product images.
+
+Files are stored as <sha256>.<ext>, hashed while streaming to disk, so the
+same photo uploaded twice is kept once and a stored name never changes
+content. That makes /uploads safe to cache forever and lets deletes check
+whether any other product still references a file before removing it.
+Bulk deletes hand their images to a background thread
+(release_images_later) so the admin request does no file I/O.
+"""
+
+import hashlib
+import logging
+import os
+import queue
+import re
+import tempfile
+import threading
+
+from werkzeug.utils import secure_filename
+
+from image_service import remove_variants
+from models import db, Product
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+
+HASHED_NAME = re.compile(r'^[0-9a-f]{64}(_\d+w)?\.[a-z0-9]+$')
+
+
+def is_content_addressed(filename):
+    """True for names produced by this module (originals and their variants)"""
+    return bool(HASHED_NAME.match(filename or ''))
+
+
+def _extension(filename):
+    ext = os.path.splitext(secure_filename(filename or ''))[1].lower()
+    return ext if ext else '.bin'
+
+
+def _store_stream(stream, upload_folder, ext):
+    """Hash a stream while copying it into upload_folder; return the stored name"""
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=upload_folder, prefix='.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as tmp:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                tmp.write(chunk)
+        filename = digest.hexdigest() + ext
+        target = os.path.join(upload_folder, filename)
+        if os.path.exists(target):
+            os.remove(tmp_path)  # identical content already stored
+        else:
+            os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return filename
+
+
+def save_upload(file, upload_folder):
+    """
+    Store an uploaded file under its content hash
+
+    Args:
+        file (FileStorage): request.files entry
+        upload_folder (str): UPLOAD_FOLDER
+
+    Returns:
+        str: stored file name (<sha256>.<ext>)
+    """
+    return _store_stream(file.stream, upload_folder, _extension(file.filename))
+
+
+def store_existing(upload_folder, filename):
+    """Copy a legacy upload into content-addressed storage; return the new name"""
+    with open(os.path.join(upload_folder, filename), 'rb') as source:
+        return _store_stream(source, upload_folder, _extension(filename))
+
+
+def reference_count(filename):
+    """Number of products whose image is filename"""
+    return Product.query.filter(Product.image == filename).count()
+
+
+def release_image(upload_folder, filename, image_variants):
+    """
+    Delete an image and its variants if no product references it any more
+
+    Call after the change that dropped the reference has been committed.
+    """
+    if not filename or reference_count(filename):
+        return False
+    try:
+        os.remove(os.path.join(upload_folder, filename))
+    except FileNotFoundError:
+        pass
+    remove_variants(upload_folder, image_variants)
+    return True
+
+
+def release_images(upload_folder, images):
+    """
+    Delete the images (and variants) that no product references any more
+
+    Args:
+        upload_folder (str): UPLOAD_FOLDER
+        images (list): (filename, image_variants) pairs of removed products
+
+    Returns:
+        int: number of images deleted
+    """
+    pending = {}
+    for filename, image_variants in images:
+        if filename:
+            pending.setdefault(filename, image_variants)
+    if not pending:
+        return 0
+    referenced = {row[0] for row in db.session.query(Product.image)
+                  .filter(Product.image.in_(list(pending))).distinct()}
+    removed = 0
+    for filename, image_variants in pending.items():
+        if filename in referenced:
+            continue
+        try:
+            os.remove(os.path.join(upload_folder, filename))
+        except FileNotFoundError:
+            pass
+        remove_variants(upload_folder, image_variants)
+        removed += 1
+    return removed
+
+
+class ImageCleaner(threading.Thread):
+    """Background thread that releases images queued by release_images_later()"""
+
+    def __init__(self, app):
+        super().__init__(name='image-cleaner', daemon=True)
+        self.app = app
+        self.jobs = queue.Queue()
+
+    def run(self):
+        while True:
+            upload_folder, images = self.jobs.get()
+            try:
+                with self.app.app_context():
+                    removed = release_images(upload_folder, images)
+                if removed:
+                    logger.info('Removed %d unreferenced images', removed)
+            except Exception:
+                logger.exception('Image cleanup failed')
+
+
+_cleaner = None
+_cleaner_lock = threading.Lock()
+
+
+def release_images_later(app, images):
+    """Queue images of deleted products for release_images() on this process's cleaner thread"""
+    global _cleaner
+    if not images:
+        return
+    with _cleaner_lock:
+        if _cleaner is None or not _cleaner.is_alive():
+            _cleaner = ImageCleaner(app)
+            _cleaner.start()
+    _cleaner.jobs.put((app.config['UPLOAD_FOLDER'], images))
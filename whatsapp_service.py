@@ -5,7 +5,7 @@ Uses WhatsApp Click-to-Chat feature
 """
 
 from urllib.parse import quote
-from config import WHATSAPP_NUMBER
+from settings_service import get_whatsapp_number
 
 def format_phone_number(phone):
     """
@@ -44,9 +44,9 @@ def generate_whatsapp_link(phone_number, message):
     encoded_message = quote(message)
     return f"https://wa.me/{formatted_phone}?text={encoded_message}"
 
-def send_custom_order_notification(order_details):
+def build_custom_order_message(order_details):
     """
-    Generate WhatsApp notification link for custom order
+    Build the owner notification text for a custom order
     
     Args:
         order_details (dict): Dictionary containing order information
@@ -60,11 +60,9 @@ def send_custom_order_notification(order_details):
             - phone: Customer phone number
     
     Returns:
-        str: WhatsApp link URL for owner
+        str: Message body
     """
-    
-    # Build message
-    message_body = f"""🎁 NEW CUSTOM ORDER 🎁
+    return f"""🎁 NEW CUSTOM ORDER 🎁
 
 📋 Order Details:
 • Product Type: {order_details.get('product_type', 'N/A')}
@@ -79,25 +77,19 @@ def send_custom_order_notification(order_details):
 • Phone: {order_details.get('phone', 'N/A')}
 
 Please contact the customer to confirm the order."""
-    
-    # Generate link for owner's WhatsApp
-    return generate_whatsapp_link(WHATSAPP_NUMBER, message_body)
 
-def send_order_confirmation(customer_phone, order_id, product_type):
+def build_order_confirmation_message(order_id, product_type):
     """
-    Generate WhatsApp confirmation link for customer
+    Build the customer confirmation text for a custom order
     
     Args:
-        customer_phone (str): Customer's phone number
         order_id (int): Order ID
         product_type (str): Type of product ordered
     
     Returns:
-        str: WhatsApp link URL for customer
+        str: Message body
     """
-    
-    # Build confirmation message
-    message_body = f"""Thank you for your custom order! 🎉
+    return f"""Thank you for your custom order! 🎉
 
 Your Order ID: {order_id}
 Product Type: {product_type}
@@ -105,6 +97,67 @@ Product Type: {product_type}
 We have received your order and will contact you shortly to confirm the details and discuss pricing.
 
 Thank you for choosing us! 🧺"""
+
+def build_cart_link_code_message(code):
+    """
+    Build the message carrying a cart-sync verification code
+    
+    Args:
+        code (str): One-time code from cart_service.request_link_code()
+    
+    Returns:
+        str: Message body
+    """
+    return f"""Your cart code is {code}
+
+Enter it on the cart page to keep the same cart on all your devices. It expires in 10 minutes. If you did not ask for it, you can ignore this message."""
+
+def send_custom_order_notification(order_details):
+    """
+    Generate WhatsApp notification link for custom order
+    
+    Args:
+        order_details (dict): Order information, see build_custom_order_message()
+    
+    Returns:
+        str: WhatsApp link URL for owner
+    """
+    
+    # Generate link for owner's WhatsApp
+    return generate_whatsapp_link(get_whatsapp_number(), build_custom_order_message(order_details))
+
+def send_order_confirmation(customer_phone, order_id, product_type):
+    """
+    Generate WhatsApp confirmation link for customer
+    
+    Args:
+        customer_phone (str): Customer's phone number
+        order_id (int): Order ID
+        product_type (str): Type of product ordered
+    
+    Returns:
+        str: WhatsApp link URL for customer
+    """
     
     # Generate link for customer's WhatsApp
-    return generate_whatsapp_link(customer_phone, message_body)
+    return generate_whatsapp_link(customer_phone, build_order_confirmation_message(order_id, product_type))
+
+def generate_cart_order_link(phone_number, resolved_cart):
+    """
+    Generate WhatsApp order link for the items in a resolved cart
+    
+    Args:
+        phone_number (str): Owner's WhatsApp number
+        resolved_cart (ResolvedCart): Output of cart_service.resolve_session_cart()
+    
+    Returns:
+        str: WhatsApp link URL for owner
+    """
+    
+    # Build order message from the same line items shown on the cart page
+    lines = ['Hello, I would like to order:']
+    for item in resolved_cart.items:
+        lines.append(f"{item['product'].name} - Quantity: {item['quantity']} - Price: ₹{item['product'].price:.2f}")
+    lines.append(f"Total: ₹{resolved_cart.total:.2f}")
+    
+    return generate_whatsapp_link(phone_number, '\n'.join(lines))